@@ -2,12 +2,19 @@
 GitHub Demo API
 """
 
-__all__ = ['parse_url', 'add_url_params', 'Resource', 'Container', 'Repo']
+__all__ = ['parse_url', 'parse_owner_url', 'add_url_params', 'Checkpoint',
+           'Resource', 'Container', 'Repo', 'Org', 'User', 'GitCommits']
 __version__ = '0.0.1'
 
 
+import base64
 import datetime
+import hashlib
+import json
+import os
 import posixpath
+import re
+import subprocess
 import urllib.parse
 
 
@@ -37,6 +44,26 @@ def parse_url(url):
     return owner, repo
 
 
+def parse_owner_url(url):
+    """
+    Extract owner from GitHub URL
+
+    Args:
+        url (str): valid link
+
+    Returns:
+        str
+    """
+    parsed_url = urllib.parse.urlsplit(url)
+    if not parsed_url.netloc:
+        raise ValueError(f'Url {url} is not valid')
+    owner, *_ = parsed_url.path.strip('/').split('/')
+    if not owner:
+        raise ValueError(f'Url {url} does not contain owner')
+
+    return owner
+
+
 def add_url_params(url, params):
     """
     Add parameters to URL
@@ -56,6 +83,92 @@ def add_url_params(url, params):
     return urllib.parse.urlunparse(parts)
 
 
+class Checkpoint:
+    """
+    Pagination checkpoints storage
+
+    Keeps fetched pages of each container in a separate JSON lines file,
+    one line per page with its URL, ETag, next page URL and items.
+    """
+    def __init__(self, directory, resume=False):
+        """
+        Args:
+            directory (str): checkpoints directory
+            resume (bool): return stored pages or start from scratch
+        """
+        self.directory = directory
+        self.resume = resume
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} directory="{self.directory}">'
+
+    def _file(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode()).hexdigest() + '.jsonl')
+
+    def pages(self, url):
+        """
+        Get stored pages of the container
+
+        Args:
+            url (str): container URL
+
+        Returns:
+            list(dict): pages or empty list if resume is off
+        """
+        if not self.resume or not os.path.exists(self._file(url)):
+            return []
+
+        pages = []
+        with open(self._file(url)) as f:
+            for line in f:
+                try:
+                    pages.append(json.loads(line))
+                except ValueError:
+                    # Line was not completely written when the crawl was interrupted
+                    break
+
+        return pages
+
+    def reset(self, url, pages=()):
+        """
+        Remove stored pages of the container except the given ones
+
+        Args:
+            url (str): container URL
+            pages (list(dict)): stored pages to keep
+        """
+        with open(self._file(url), 'w') as f:
+            for page in pages:
+                f.write(json.dumps(page) + '\n')
+
+    def save(self, url, page_url, response, items, next_url):
+        """
+        Store fetched page
+
+        Args:
+            url (str): container URL
+            page_url (str): page URL
+            response (Response): page response
+            items (list): page items
+            next_url (str): next page URL or None for the last page
+
+        Returns:
+            str: next page URL
+        """
+        headers = response.headers
+        page = {'url': page_url,
+                'etag': headers and headers.get('ETag'),
+                'next': next_url,
+                'items': items}
+        with open(self._file(url), 'a') as f:
+            f.write(json.dumps(page) + '\n')
+            f.flush()
+
+        return next_url
+
+
 class Resource:
     """
     Web resource base class
@@ -91,17 +204,14 @@ class Resource:
     def __repr__(self):
         return f'<{self.__class__.__name__} path="{self.path}">'
 
-    def load(self, api=None, path=None, **kwargs):
+    def _configure(self, api, path, kwargs):
         """
-        Load web resource
+        Assign and check load arguments
 
         Args:
             api: REST API methods class
             path: resource URL
-            **kwargs: API arguments
-
-        Returns:
-            Resource
+            kwargs (dict): API arguments
         """
         self._api = api or self._api
         self.path = path or self.path
@@ -112,6 +222,20 @@ class Resource:
         if not self.path:
             raise ValueError('path argument did not present')
 
+    def load(self, api=None, path=None, **kwargs):
+        """
+        Load web resource
+
+        Args:
+            api: REST API methods class
+            path: resource URL
+            **kwargs: API arguments
+
+        Returns:
+            Resource
+        """
+        self._configure(api, path, kwargs)
+
         self._response = self._api.get(self.path, **self._api_kwargs)
         self._raw = self._response.json()
 
@@ -136,17 +260,32 @@ class Resource:
 
         return self
 
+    def dump(self):
+        """
+        Get resource data in the API format, parsed dates are formatted back
+
+        Returns:
+            dict
+        """
+        return {k: v.strftime(self.dtm_format) if isinstance(v, datetime.datetime) else v
+                for k, v in self._raw.items()}
+
 
 class Container(Resource):
     """
     Web resources container
     """
     item_type = Resource
+    # Item field identifying an item within the container
+    key = 'id'
 
     def __init__(self, api=None, path=None, **kwargs):
         super().__init__(api=None, path=None, **kwargs)
 
+        self._raw = []
         self.items = []
+        # Item key to position in items, built on the first upsert
+        self._index = None
 
     def __getitem__(self, item):
         return self.items[item]
@@ -159,25 +298,113 @@ class Container(Resource):
                 f'path="{self.path}" '
                 f'items={len(self._raw)}>')
 
-    def load(self, api=None, path=None, **kwargs):
+    def load(self, api=None, path=None, checkpoint=None, until=None, **kwargs):
         """
         Load container with pagination support
 
+        Args:
+            api: REST API methods class
+            path: resource URL
+            checkpoint (Checkpoint): fetched pages storage to resume an interrupted load
+            until (callable): stop loading after the first item it returns True for
+            **kwargs: API arguments
+
         Returns:
             Container
         """
-        super().load(api, path, **kwargs)
-
-        current = self._response
-        while True:
-            next_url = current.headers.links.get('next')
-            if not next_url:
+        self._configure(api, path, kwargs)
+        self._response = None
+        self._raw = []
+
+        # Stored pages are reused until the first modified one,
+        # loading continues from its fresh response
+        page_url, current = self.path, None
+        pages = checkpoint.pages(self.path) if checkpoint else []
+        for kept, page in enumerate(pages):
+            current = self._modified(page)
+            if current is not None:
+                page_url = page['url']
                 break
-            current = self._api.get(next_url, **self._api_kwargs)
-            self._raw.extend(current.json())
+            self._raw.extend(page['items'])
+            # Stateful stop conditions have to see reused items too
+            self._until(page['items'], until)
+            page_url = page['next']
+        else:
+            kept = len(pages)
+            if pages and not page_url:
+                return self
+
+        if checkpoint:
+            checkpoint.reset(self.path, pages[:kept])
+
+        while page_url:
+            if current is None:
+                current = self._api.get(page_url, **self._api_kwargs)
+            self._response = self._response or current
+            items = self._until(current.json(), until)
+            self._raw.extend(items)
+            page_url = self._save(checkpoint, page_url, current, items, until)
+            current = None
 
         return self
 
+    def _modified(self, page):
+        """
+        Check the stored page with a conditional request
+
+        Not modified responses do not count against GitHub rate limit.
+
+        Args:
+            page (dict): stored page
+
+        Returns:
+            Response: fresh response or None if the page is not modified
+        """
+        headers = {'If-None-Match': page['etag']} if page.get('etag') else None
+        response = self._api.get(page['url'], headers=headers, **self._api_kwargs)
+        if headers and getattr(response, 'status', None) == 304:
+            return None
+
+        return response
+
+    @staticmethod
+    def _until(items, until):
+        """
+        Cut page items after the stop item
+
+        Args:
+            items (list): page items
+            until (callable): stop condition or None
+
+        Returns:
+            list
+        """
+        if until:
+            for i, item in enumerate(items):
+                if until(item):
+                    return items[:i + 1]
+        return items
+
+    def _save(self, checkpoint, page_url, response, items, until=None):
+        """
+        Store page to the checkpoint
+
+        Args:
+            checkpoint (Checkpoint): fetched pages storage or None
+            page_url (str): page URL
+            response (Response): page response
+            items (list): page items
+            until (callable): stop condition or None
+
+        Returns:
+            str: next page URL or None if the page is the last one or stop item is reached
+        """
+        stopped = until and items and until(items[-1])
+        next_url = None if stopped else response.headers.links.get('next')
+        if not checkpoint:
+            return next_url
+        return checkpoint.save(self.path, page_url, response, items, next_url)
+
     def parse(self, data=None, resource=None):
         """
         Assign JSON data to Container data
@@ -195,9 +422,80 @@ class Container(Resource):
             self._raw = data
 
         self.items = [resource().parse(item) for item in self._raw]
+        self._index = None
 
         return self
 
+    def _key_index(self):
+        """
+        Get item positions by key, build it if needed
+
+        Returns:
+            dict
+        """
+        if self._index is None:
+            self._index = {item._raw.get(self.key): i for i, item in enumerate(self.items)}
+
+        return self._index
+
+    def upsert(self, data):
+        """
+        Insert a new item or replace an existing one with the same key
+
+        Args:
+            data (dict): item data
+
+        Returns:
+            Resource: parsed item
+        """
+        index = self._key_index()
+
+        item = self.item_type().parse(dict(data))
+        position = index.get(item._raw.get(self.key))
+        if position is None:
+            index[item._raw.get(self.key)] = len(self.items)
+            self.items.append(item)
+            self._raw.append(item._raw)
+        else:
+            self.items[position] = item
+            self._raw[position] = item._raw
+
+        return item
+
+    def remove(self, data):
+        """
+        Remove item with the same key
+
+        Args:
+            data (dict): item data
+
+        Returns:
+            Resource: removed item or None if it is not stored
+        """
+        position = self._key_index().get(data.get(self.key))
+        if position is None:
+            return None
+
+        item = self.items.pop(position)
+        del self._raw[position]
+        self._index = None
+
+        return item
+
+    def get(self, key, default=None):
+        """
+        Get item by key
+
+        Args:
+            key: item key value
+            default: value for missing item
+
+        Returns:
+            Resource
+        """
+        position = self._key_index().get(key)
+        return default if position is None else self.items[position]
+
 
 class Repo(Resource):
     """
@@ -206,11 +504,20 @@ class Repo(Resource):
     resource_url = 'repos'
     params = {'per_page': 100, 'state': 'all'}
 
-    def __init__(self, owner, repository, branch='master', api_root=ROOT, api=None, **kwargs):
+    def __init__(self, owner, repository, branch='master', api_root=ROOT, api=None, mirror=None, **kwargs):
+        """
+        Args:
+            branch (str or list(str)): branch or branches to analyze
+        """
         self._root = api_root
         self.owner = owner
         self.repository = repository
-        self.branch = branch
+        self.branches = [branch] if isinstance(branch, str) else list(branch)
+        self.branch = self.branches[0]
+        # Branch head commit sha
+        self.heads = {}
+        # Local git mirror directory to read commits from
+        self.mirror = mirror
 
         self.commits = None
         self.contributors = None
@@ -222,44 +529,256 @@ class Repo(Resource):
 
         super().__init__(api, path, **kwargs)
 
-    def load_container(self, container, url):
+    def load_container(self, container, url, checkpoint=None, until=None):
         """
         Load resource container
 
         Args:
             container(type): Container class
             url (str): container URL
+            checkpoint (Checkpoint): fetched pages storage
+            until (callable): stop loading after the first item it returns True for
 
         Returns:
             Container
         """
-        return container().load(self._api, add_url_params(url, self.params), **self._api_kwargs).parse()
+        return container().load(self._api, add_url_params(url, self.params),
+                                checkpoint=checkpoint, until=until, **self._api_kwargs).parse()
+
+    def load_commits(self, checkpoint=None):
+        """
+        Load commits of all branches
+
+        Commits are stored once. Extra branches are loaded until
+        all parents of their commits are known, older history is shared.
+
+        Args:
+            checkpoint (Checkpoint): fetched pages storage
+
+        Returns:
+            Commits
+        """
+        if self.mirror:
+            def lookup(sha):
+                return self._api.get(self.commits_url.format(**{'/sha': f'/{sha}'}), **self._api_kwargs).json()
+
+            mirror = GitCommits(self.mirror, self.clone_url, self._api_kwargs.get('credentials', ()))
+            commits = mirror.fetch().load(*self.branches).resolve(lookup).parse()
+            self.heads = commits.heads
+            return commits
+
+        commits = Commits().parse([])
+        url = self.commits_url.format(**{'/sha': ''})
+        for branch in self.branches:
+            listing = self.load_container(Commits, add_url_params(url, {'sha': branch}), checkpoint,
+                                          until=Commits.until_complete(commits))
+            for commit in listing:
+                commits.upsert(commit._raw)
+            if listing.items:
+                self.heads[branch] = listing[0].sha
+
+        return commits
+
+    def branch_commits(self, branch):
+        """
+        Get branch history from the stored commits
+
+        Args:
+            branch (str): loaded branch
 
-    def load_containers(self):
+        Returns:
+            list(Commit)
+        """
+        result = []
+        seen = set()
+        stack = [self.heads[branch]] if branch in self.heads else []
+        while stack:
+            sha = stack.pop()
+            commit = self.commits.get(sha)
+            if sha in seen or commit is None:
+                continue
+            seen.add(sha)
+            result.append(commit)
+            stack.extend(parent['sha'] for parent in reversed(commit._raw.get('parents', [])))
+
+        return result
+
+    def load_containers(self, checkpoint=None, containers=None):
         """
         Load resource containers
 
+        Args:
+            checkpoint (Checkpoint): fetched pages storage to resume an interrupted load
+            containers (iterable(str)): commits, contributors, pulls or issues (default: all)
+
         Returns:
             Repo
         """
         # Bypass empty API arguments
         empty_substitute = {'/number': ''}
-        branch_substitute = {'/sha': ''}
+        containers = set(containers or ['commits', 'contributors', 'pulls', 'issues'])
+
+        if 'commits' in containers:
+            self.commits = self.load_commits(checkpoint)
+        if 'contributors' in containers:
+            self.contributors = self.load_container(Contributors, self.contributors_url.format(None), checkpoint)
+        if 'pulls' in containers:
+            self.pulls = self.load_container(Pulls, self.pulls_url.format(**empty_substitute), checkpoint)
+        if 'issues' in containers:
+            self.issues = self.load_container(Issues, self.issues_url.format(**empty_substitute), checkpoint)
+
+        return self
+
+    def unload(self):
+        """
+        Drop loaded containers to free memory
 
-        self.commits = self.load_container(Commits, add_url_params(
-            self.commits_url.format(**branch_substitute), {'sha': self.branch}))
-        self.contributors = self.load_container(Contributors, self.contributors_url.format(None))
-        self.pulls = self.load_container(Pulls, self.pulls_url.format(**empty_substitute))
-        self.issues = self.load_container(Issues, self.issues_url.format(**empty_substitute))
+        Returns:
+            Repo
+        """
+        self.commits = None
+        self.contributors = None
+        self.pulls = None
+        self.issues = None
 
         return self
 
+    @property
+    def full_name(self):
+        """
+        Repository name in `owner/repo` format
+
+        Returns:
+            str
+        """
+        return f'{self.owner}/{self.repository}'
+
+    def apply_event(self, event, payload):
+        """
+        Apply GitHub webhook payload to the loaded containers
+
+        Supports `push`, `pull_request` and `issues` events,
+        other events are ignored. Items of `deleted` actions are removed.
+
+        Pushed commits are loaded from the API starting at the new head
+        until all their parents are known, so they have real parents. Without
+        API the payload commits are stored without parents. Known commits
+        are never rewritten.
+
+        Args:
+            event (str): event name (X-GitHub-Event header)
+            payload (dict): event payload
+
+        Returns:
+            list(Resource): upserted or removed items
+        """
+        if event == 'push':
+            branch = payload.get('ref', '').replace('refs/heads/', '', 1)
+            if branch not in self.branches or payload.get('deleted'):
+                return []
+            if self.commits is None:
+                self.commits = Commits()
+            after = payload.get('after')
+            if self._api is not None and after:
+                url = add_url_params(self.commits_url.format(**{'/sha': ''}), {'sha': after})
+                listing = self.load_container(Commits, url, until=Commits.until_complete(self.commits))
+                pushed = [commit._raw for commit in listing]
+            else:
+                pushed = [Commit.from_push(commit) for commit in payload.get('commits', [])]
+            items = [self.commits.upsert(data) for data in pushed if self.commits.get(data['sha']) is None]
+            if after:
+                self.heads[branch] = after
+            return items
+        if event in ('pull_request', 'issues'):
+            attribute, field, container = {'pull_request': ('pulls', 'pull_request', Pulls),
+                                           'issues': ('issues', 'issue', Issues)}[event]
+            if getattr(self, attribute) is None:
+                setattr(self, attribute, container())
+            if payload.get('action') == 'deleted':
+                item = getattr(self, attribute).remove(payload[field])
+                return [item] if item else []
+            return [getattr(self, attribute).upsert(payload[field])]
+
+        return []
+
+
+class Owner(Container):
+    """
+    Repositories owner API
+    """
+    item_type = Resource
+    resource_url = None
+    params = {'per_page': 100}
+
+    def __init__(self, owner, api_root=ROOT, api=None, **kwargs):
+        super().__init__(**kwargs)
+
+        self._root = api_root
+        self._api = api
+        self.owner = owner
+        self.path = add_url_params(urllib.parse.urljoin(self._root, posixpath.join(
+            self.resource_url, owner, 'repos')), self.params)
+
+    def repos(self, branch=None):
+        """
+        Get owner repositories
+
+        Repositories are parsed from the listing, so they do not need to be loaded.
+
+        Args:
+            branch (str): branch to analyze or None for repository default branch
+
+        Returns:
+            generator(Repo)
+        """
+        for item in self:
+            yield Repo(item.owner['login'], item.name, branch=branch or item.default_branch,
+                       api_root=self._root, api=self._api, **self._api_kwargs).parse(dict(item._raw))
+
+
+class Org(Owner):
+    """
+    Organization repositories API
+    """
+    resource_url = 'orgs'
+
+
+class User(Owner):
+    """
+    User repositories API
+    """
+    resource_url = 'users'
+
 
 class Commit(Resource):
     """
     Repository Contributor API
     """
-    pass
+    @staticmethod
+    def from_push(data):
+        """
+        Convert push event commit to the commits API format
+
+        Args:
+            data (dict): commit from push event payload
+
+        Returns:
+            dict
+        """
+        def user(person):
+            login = (person or {}).get('username')
+            return {'login': login} if login else None
+
+        return {
+            'sha': data['id'],
+            'commit': {
+                'message': data.get('message'),
+                'author': data.get('author'),
+                'committer': data.get('committer'),
+                },
+            'author': user(data.get('author')),
+            'committer': user(data.get('committer')),
+            }
 
 
 class Contributor(Resource):
@@ -288,6 +807,33 @@ class Commits(Container):
     Repository Contributor API
     """
     item_type = Commit
+    key = 'sha'
+
+    @staticmethod
+    def until_complete(known):
+        """
+        Build commits listing stop condition
+
+        Listing is ordered by date, so commits of a branch may follow
+        the first known one (e.g. when master is merged into the branch).
+        Loading stops when every parent of listed commits is listed or known.
+
+        Args:
+            known (Commits): already stored commits
+
+        Returns:
+            callable
+        """
+        listed, missing = set(), set()
+
+        def until(item):
+            listed.add(item['sha'])
+            missing.discard(item['sha'])
+            missing.update(parent['sha'] for parent in item.get('parents', [])
+                           if parent['sha'] not in listed and known.get(parent['sha']) is None)
+            return not missing
+
+        return until
 
 
 class Contributors(Container):
@@ -309,3 +855,164 @@ class Issues(Container):
     Repository Issue API
     """
     item_type = Issue
+
+
+class GitCommits(Commits):
+    """
+    Repository commits read from a local git mirror
+
+    Commits are converted to the commits API format. Git does not know
+    GitHub logins, so they are taken from noreply e-mails or resolved
+    with the commits API once per e-mail (see resolve).
+
+    Git never prompts for credentials: inaccessible repositories fail
+    with CalledProcessError carrying git stderr.
+    """
+    # Fields are separated by Unit Separator, commits by NUL (-z option)
+    log_format = '%x1f'.join(['%H', '%P', '%an', '%ae', '%ad', '%cn', '%ce', '%cd', '%B'])
+    date_format = 'format-local:%Y-%m-%dT%H:%M:%SZ'
+    noreply = re.compile(r'^(?:\d+\+)?(?P<login>[^@]+)@users\.noreply\.github\.com$')
+
+    def __init__(self, directory, url=None, credentials=()):
+        """
+        Args:
+            directory (str): bare repository or mirror directory
+            url (str): clone URL or None for existing mirror
+            credentials (tuple): user and password or token for HTTP remotes
+        """
+        super().__init__()
+
+        self.directory = directory
+        self.url = url
+        self.credentials = credentials
+        self.path = directory
+        # Branch head commit sha
+        self.heads = {}
+
+    @property
+    def env(self):
+        """
+        Git environment: no prompts, UTC dates, Authorization header
+
+        Returns:
+            dict
+        """
+        env = dict(os.environ, TZ='UTC', GIT_TERMINAL_PROMPT='0')
+        if self.credentials and all(self.credentials):
+            encoded = base64.b64encode('{}:{}'.format(*self.credentials).encode()).decode('ascii')
+            # Passed via environment to keep the secret out of the process list
+            env.update(GIT_CONFIG_COUNT='1', GIT_CONFIG_KEY_0='http.extraHeader',
+                       GIT_CONFIG_VALUE_0=f'Authorization: Basic {encoded}')
+        return env
+
+    def run(self, *args):
+        """
+        Run git command
+
+        Returns:
+            str: command output
+        """
+        return subprocess.run(['git', *args], check=True, stdin=subprocess.DEVNULL,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              env=self.env).stdout.decode(errors='replace')
+
+    def git(self, *args):
+        """
+        Run git command in the mirror directory
+
+        Returns:
+            str: command output
+        """
+        return self.run('--git-dir', self.directory, *args)
+
+    def fetch(self):
+        """
+        Clone repository without blobs or fetch new commits
+
+        Fetch goes through origin remote, so the clone blob filter is kept.
+
+        Returns:
+            GitCommits
+        """
+        if not os.path.exists(self.directory):
+            self.run('clone', '--quiet', '--bare', '--filter=blob:none', self.url, self.directory)
+        elif self.url:
+            self.git('fetch', '--quiet', '--prune', 'origin', '+refs/heads/*:refs/heads/*')
+
+        return self
+
+    @classmethod
+    def user(cls, name, email):
+        """
+        Build API user from git signature
+
+        Args:
+            name (str): signature name
+            email (str): signature e-mail
+
+        Returns:
+            dict: login is None unless e-mail is a GitHub noreply one
+        """
+        match = cls.noreply.match(email)
+        return {'login': match.group('login') if match else None, 'name': name, 'email': email}
+
+    def load(self, *branches):
+        """
+        Load history of branches
+
+        Shared commits are listed once.
+
+        Args:
+            *branches (str): branch names (default: master)
+
+        Returns:
+            GitCommits
+        """
+        refs = [f'refs/heads/{branch}' for branch in branches or ['master']]
+        self.heads = dict(zip(branches or ['master'], self.git('rev-parse', *refs).split()))
+        output = self.git('log', '-z', f'--format={self.log_format}', f'--date={self.date_format}', *refs, '--')
+
+        self._raw = []
+        for record in filter(None, output.split('\0')):
+            # Message is the last field and may contain the separator
+            sha, parents, a_name, a_email, a_date, c_name, c_email, c_date, message = record.split('\x1f', 8)
+            self._raw.append({
+                'sha': sha,
+                'parents': [{'sha': parent} for parent in parents.split()],
+                'commit': {
+                    'author': {'name': a_name, 'email': a_email, 'date': a_date},
+                    'committer': {'name': c_name, 'email': c_email, 'date': c_date},
+                    'message': message.rstrip('\n'),
+                    },
+                'author': self.user(a_name, a_email),
+                'committer': self.user(c_name, c_email),
+                })
+
+        return self
+
+    def resolve(self, lookup):
+        """
+        Fill logins missing in git signatures
+
+        Every e-mail is looked up once, with the API record of its first
+        commit. Logins of e-mails without GitHub account stay None.
+
+        Args:
+            lookup (callable): get commits API record by sha
+
+        Returns:
+            GitCommits
+        """
+        logins = {}
+        for commit in self._raw:
+            for role in ('author', 'committer'):
+                user = commit[role]
+                if user['login'] is not None:
+                    continue
+                if user['email'] not in logins:
+                    record = lookup(commit['sha'])
+                    for name in ('author', 'committer'):
+                        logins.setdefault(commit['commit'][name]['email'], (record.get(name) or {}).get('login'))
+                user['login'] = logins[user['email']]
+
+        return self
@@ -1,3 +1,6 @@
+import os
+import subprocess
+import tempfile
 import unittest
 
 from . import *
@@ -20,6 +23,18 @@ class ParseUrlTest(unittest.TestCase):
             parse_url('//gh.c/owner/')
 
 
+class ParseOwnerUrlTest(unittest.TestCase):
+    def test_parse_owner_url(self):
+        self.assertEqual('dm-logv', parse_owner_url('https://github.com/dm-logv'))
+        self.assertEqual('dm-logv', parse_owner_url('//github.com/dm-logv/aero-stat/'))
+
+        with self.assertRaises(ValueError):
+            parse_owner_url('github.com/dm-logv')
+
+        with self.assertRaises(ValueError):
+            parse_owner_url('//github.com/')
+
+
 class AddUrlParamsTest(unittest.TestCase):
     def test_add_url_params(self):
         self.assertEqual('http://s.wr/person/?name=Luke&surname=Skywalker',
@@ -120,6 +135,13 @@ class ContainerTest(unittest.TestCase):
         for i, item in enumerate(self.container):
             self.assertEqual(self.container[i], item)
 
+    def test_upsert(self):
+        container = Container().parse([{'id': 1, 'name': 'Mike'}])
+        container.upsert({'id': 2, 'name': 'Nick'})
+        container.upsert({'id': 1, 'name': 'Oak'})
+
+        self.assertEqual(['Oak', 'Nick'], [item.name for item in container])
+
 
 class RepoTest(unittest.TestCase):
     def setUp(self):
@@ -136,3 +158,315 @@ class RepoTest(unittest.TestCase):
     def test_load(self):
         self.repo.load()
         self.assertEqual({'url': self.repo.path}, self.repo._raw)
+
+
+class PagedApi:
+    """
+    Paginated WebApi mock class
+    """
+    class Headers:
+        def __init__(self, links, etag):
+            self.links = links
+            self.etag = etag
+
+        def get(self, name, default=None):
+            return self.etag if name == 'ETag' else default
+
+    class Response:
+        def __init__(self, data, links, etag, status=200):
+            self.data = data
+            self.status = status
+            self.headers = PagedApi.Headers(links, etag)
+
+        def json(self):
+            return list(self.data)
+
+    def __init__(self, pages, fail=None):
+        """
+        Args:
+            pages (dict(url, list)): page data by URL
+            fail (str): URL raising connection error
+        """
+        self.pages = pages
+        self.fail = fail
+        self.requested = []
+        self.responses = []
+
+    def get(self, url, headers=None, **kwargs):
+        if url == self.fail:
+            raise ConnectionError(url)
+        self.requested.append(url)
+        urls = list(self.pages)
+        position = urls.index(url)
+        links = {'next': urls[position + 1]} if position + 1 < len(urls) else {}
+        etag = str(hash(str(self.pages[url])))
+        if headers and headers.get('If-None-Match') == etag:
+            response = self.Response([], links, etag, status=304)
+        else:
+            response = self.Response(self.pages[url], links, etag)
+        self.responses.append(response)
+        return response
+
+
+class OrgTest(unittest.TestCase):
+    def setUp(self):
+        def repo(name):
+            return {'name': name, 'owner': {'login': 'plrx'}, 'default_branch': 'main',
+                    'commits_url': f'http://gh.com/repos/plrx/{name}/commits{{/sha}}'}
+
+        self.api = PagedApi({
+            'http://gh.com/orgs/plrx/repos?per_page=100': [repo('one'), repo('two')],
+            'http://gh.com/orgs/plrx/repos?per_page=100&page=2': [repo('three')],
+            })
+        self.org = Org('plrx', api_root='http://gh.com', api=self.api).load().parse()
+
+    def test_pagination(self):
+        self.assertEqual(2, len(self.api.requested))
+
+    def test_repos(self):
+        repos = list(self.org.repos())
+
+        self.assertEqual(['plrx/one', 'plrx/two', 'plrx/three'], [repo.full_name for repo in repos])
+        self.assertEqual('main', repos[0].branch)
+        self.assertIs(self.api, repos[0]._api)
+        self.assertEqual('http://gh.com/repos/plrx/one/commits{/sha}', repos[0].commits_url)
+        self.assertEqual('dev', next(self.org.repos('dev')).branch)
+
+    def test_user_path(self):
+        self.assertEqual('http://gh.com/users/dm-logv/repos?per_page=100',
+                         User('dm-logv', api_root='http://gh.com').path)
+
+
+class CheckpointTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = 'http://gh.com/pulls'
+        self.pages = {self.path: [{'id': 1}, {'id': 2}],
+                      f'{self.path}?page=2': [{'id': 3}, {'id': 4}],
+                      f'{self.path}?page=3': [{'id': 5}]}
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def interrupted(self):
+        api = PagedApi(self.pages, fail=f'{self.path}?page=3')
+        with self.assertRaises(ConnectionError):
+            Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name))
+
+    def test_resume(self):
+        self.interrupted()
+        api = PagedApi(self.pages)
+        container = Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name, resume=True))
+
+        self.assertEqual([1, 2, 3, 4, 5], [item['id'] for item in container._raw])
+        # Stored pages are validated with conditional requests
+        self.assertEqual(list(self.pages), api.requested)
+        self.assertEqual([304, 304], [r.status for r in api.responses[:2]])
+
+    def test_changed_page(self):
+        self.interrupted()
+        self.pages[f'{self.path}?page=2'] = [{'id': 3}, {'id': 6}]
+        api = PagedApi(self.pages)
+        container = Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name, resume=True))
+
+        self.assertEqual([1, 2, 3, 6, 5], [item['id'] for item in container._raw])
+        self.assertEqual([304, 200, 200], [r.status for r in api.responses])
+        stored = Checkpoint(self.directory.name, resume=True).pages(self.path)
+        self.assertEqual([{'id': 3}, {'id': 6}], stored[1]['items'])
+
+    def test_completed(self):
+        Container().load(PagedApi(self.pages), self.path, checkpoint=Checkpoint(self.directory.name))
+        api = PagedApi(self.pages)
+        container = Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name, resume=True))
+
+        self.assertEqual(5, len(container._raw))
+        self.assertEqual([304, 304, 304], [r.status for r in api.responses])
+
+    def test_changed_first_page(self):
+        self.interrupted()
+        self.pages[self.path] = [{'id': 0}, {'id': 1}]
+        api = PagedApi(self.pages)
+        container = Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name, resume=True))
+
+        self.assertEqual([0, 1, 3, 4, 5], [item['id'] for item in container._raw])
+        self.assertEqual(list(self.pages), api.requested)
+
+    def test_no_resume(self):
+        self.interrupted()
+        api = PagedApi(self.pages)
+        Container().load(api, self.path, checkpoint=Checkpoint(self.directory.name))
+
+        self.assertEqual(list(self.pages), api.requested)
+        self.assertEqual(3, len(Checkpoint(self.directory.name, resume=True).pages(self.path)))
+
+    def test_truncated_line(self):
+        self.interrupted()
+        checkpoint = Checkpoint(self.directory.name, resume=True)
+        with open(checkpoint._file(self.path), 'a') as f:
+            f.write('{"url": "http://gh')
+
+        self.assertEqual(2, len(checkpoint.pages(self.path)))
+
+
+class GitCommitsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, 'source')
+        self.mirror = os.path.join(self.directory.name, 'mirror.git')
+
+        self.git('init', '--quiet', '--initial-branch', 'master', self.source)
+        self.commit('Initial commit', 'Luke Skywalker', '1+luke@users.noreply.github.com')
+        self.commit('Second commit', 'Leia Organa', 'leia@alderaan.org')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    @staticmethod
+    def git(*args):
+        subprocess.run(['git', *args], check=True, stdout=subprocess.DEVNULL)
+
+    def commit(self, message, name, email):
+        self.git('-C', self.source, '-c', f'user.name={name}', '-c', f'user.email={email}',
+                 'commit', '--quiet', '--allow-empty', '-m', message)
+
+    def test_load(self):
+        commits = GitCommits(self.mirror, self.source).fetch().load('master').parse()
+
+        self.assertEqual(['Second commit', 'Initial commit'], [c.commit['message'] for c in commits])
+        self.assertEqual([None, 'luke'], [c.committer['login'] for c in commits])
+        self.assertEqual('Leia Organa', commits[0].committer['name'])
+        self.assertEqual(commits[1].sha, commits[0].parents[0]['sha'])
+        self.assertRegex(commits[0].commit['author']['date'], r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\dZ$')
+
+    def test_incremental_fetch(self):
+        GitCommits(self.mirror, self.source).fetch()
+        self.commit('Third commit', 'Han Solo', 'han@falcon.org')
+        commits = GitCommits(self.mirror, self.source).fetch().load('master').parse()
+
+        self.assertEqual(3, len(list(commits)))
+
+    def test_resolve(self):
+        self.commit('Third commit', 'Leia Organa', 'leia@alderaan.org')
+        requested = []
+
+        def lookup(sha):
+            requested.append(sha)
+            return {'author': {'login': 'leia'}, 'committer': {'login': 'leia'}}
+
+        commits = GitCommits(self.mirror, self.source).fetch().load('master').resolve(lookup).parse()
+
+        self.assertEqual(['leia', 'leia', 'luke'], [c.committer['login'] for c in commits])
+        # One lookup per unknown e-mail
+        self.assertEqual([commits[0].sha], requested)
+
+    def test_separator_in_message(self):
+        self.commit('Fields\x1fin message', 'Han Solo', 'han@falcon.org')
+        commits = GitCommits(self.mirror, self.source).fetch().load('master').parse()
+
+        self.assertEqual('Fields\x1fin message', commits[0].commit['message'])
+
+    def test_inaccessible(self):
+        with self.assertRaises(subprocess.CalledProcessError) as e:
+            GitCommits(self.mirror, os.path.join(self.directory.name, 'missing')).fetch()
+        self.assertTrue(e.exception.stderr)
+
+    def test_credentials(self):
+        self.assertNotIn('GIT_CONFIG_COUNT', GitCommits(self.mirror, self.source).env)
+        env = GitCommits(self.mirror, self.source, ('luke', 'secret')).env
+        self.assertEqual('0', env['GIT_TERMINAL_PROMPT'])
+        self.assertEqual('Authorization: Basic bHVrZTpzZWNyZXQ=', env['GIT_CONFIG_VALUE_0'])
+
+    def test_branch(self):
+        self.git('-C', self.source, 'checkout', '--quiet', '-b', 'release')
+        self.commit('Release commit', 'Han Solo', 'han@falcon.org')
+        mirror = GitCommits(self.mirror, self.source).fetch()
+
+        self.assertEqual(2, len(list(mirror.load('master').parse())))
+        self.assertEqual(3, len(list(mirror.load('release').parse())))
+
+    def test_several_branches(self):
+        self.git('-C', self.source, 'checkout', '--quiet', '-b', 'release')
+        self.commit('Release commit', 'Han Solo', 'han@falcon.org')
+        commits = GitCommits(self.mirror, self.source).fetch().load('master', 'release')
+
+        self.assertEqual(3, len(commits._raw))
+        self.assertEqual({'master', 'release'}, set(commits.heads))
+
+
+class MultiBranchTest(unittest.TestCase):
+    class Api:
+        """
+        WebApi mock class serving listings split into pages
+        """
+        def __init__(self, listings):
+            self.listings = listings
+            self.requested = []
+
+        def get(self, url, **kwargs):
+            self.requested.append(url)
+            base, _, page = url.partition('&page=')
+            page = int(page or 1)
+            pages = self.listings[base]
+            links = {'next': f'{base}&page={page + 1}'} if page < len(pages) else {}
+            return PagedApi.Response(pages[page - 1], links, None)
+
+    def setUp(self):
+        def commit(sha, parent, login):
+            return {'sha': sha, 'parents': [{'sha': parent}] if parent else [], 'committer': {'login': login}}
+
+        c1, c2, c3 = commit('c1', None, 'luke'), commit('c2', 'c1', 'luke'), commit('c3', 'c2', 'leia')
+        c4, r1 = commit('c4', 'c3', 'leia'), commit('r1', 'c2', 'han')
+        # Pushed merge of master into release
+        r2 = dict(commit('r2', 'r1', 'han'), parents=[{'sha': 'r1'}, {'sha': 'c4'}])
+        url = 'http://gh.com/commits?sha={}&per_page=100&state=all'
+        self.api = self.Api({url.format('master'): [[c4, c3], [c2, c1]],
+                             url.format('release'): [[r1, c2], [c1]],
+                             url.format('r2'): [[r2, r1], [c4]]})
+
+        self.repo = Repo('dm-logv', 'aero-stat', branch=['master', 'release'],
+                         api_root='http://gh.com', api=self.api)
+        self.repo.parse({'commits_url': 'http://gh.com/commits{/sha}'})
+        self.repo.commits = self.repo.load_commits()
+
+    def test_dedup(self):
+        self.assertEqual(['c4', 'c3', 'c2', 'c1', 'r1'], [c.sha for c in self.repo.commits])
+        self.assertEqual({'master': 'c4', 'release': 'r1'}, self.repo.heads)
+        # Release pagination stops at the known c2
+        self.assertEqual(3, len(self.api.requested))
+
+    def test_branch_commits(self):
+        self.assertEqual(['c4', 'c3', 'c2', 'c1'], [c.sha for c in self.repo.branch_commits('master')])
+        self.assertEqual(['r1', 'c2', 'c1'], [c.sha for c in self.repo.branch_commits('release')])
+        self.assertEqual([], self.repo.branch_commits('develop'))
+
+    def test_merged_master(self):
+        # Release merged master in: its own r1 is listed after master commits
+        m1 = {'sha': 'm1', 'parents': [{'sha': 'r1'}, {'sha': 'c4'}], 'committer': {'login': 'han'}}
+        c = {commit['sha']: commit for commit in self.repo.commits._raw}
+        url = 'http://gh.com/commits?sha={}&per_page=100&state=all'
+        self.api.listings[url.format('release')] = [[m1, c['c4']], [c['c3'], c['r1']], [c['c2'], c['c1']]]
+        self.api.requested = []
+        self.repo.commits = self.repo.load_commits()
+
+        self.assertEqual(['m1', 'r1', 'c2', 'c1', 'c4', 'c3'],
+                         [c.sha for c in self.repo.branch_commits('release')])
+        # Release listing stops after r1, its parent c2 is known
+        self.assertEqual(4, len(self.api.requested))
+
+    def test_load_only(self):
+        self.repo.load_containers(containers=['commits'])
+
+        self.assertEqual(5, len(list(self.repo.commits)))
+        self.assertIsNone(self.repo.pulls)
+        self.assertIsNone(self.repo.contributors)
+
+    def test_push(self):
+        items = self.repo.apply_event('push', {'ref': 'refs/heads/release', 'before': 'r1', 'after': 'r2',
+                                               'commits': [{'id': 'r2', 'committer': {'username': 'han'}}]})
+
+        self.assertEqual(['r2'], [c.sha for c in items])
+        self.assertEqual(['r2', 'r1', 'c2', 'c1', 'c4', 'c3'],
+                         [c.sha for c in self.repo.branch_commits('release')])
+        # Listing stops at the known r1, r2 parents come from the API
+        self.assertEqual('http://gh.com/commits?sha=r2&per_page=100&state=all', self.api.requested[-1])
+        self.assertEqual({'login': 'han'}, self.repo.commits.get('r2').committer)
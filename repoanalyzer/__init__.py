@@ -5,11 +5,308 @@ Repository analyzer
 __all__ = []
 __version__ = '0.0.1'
 
+import csv
 import datetime
+import heapq
+import itertools
+import json
+import math
 import operator
+import sys
 from collections import Counter
 
 
+class QuantileSketch:
+    """
+    Mergeable streaming quantile sketch
+
+    Values are counted in logarithmic buckets, so any quantile is returned
+    with bounded relative error in constant memory. Sketches with the same
+    accuracy can be merged without re-scanning the values.
+    """
+    def __init__(self, relative_accuracy=0.01, max_bins=2048, min_value=1e-6):
+        """
+        Args:
+            relative_accuracy (float): max relative error of quantiles
+            max_bins (int): max number of buckets, the lowest ones are collapsed
+            min_value (float): values below are counted as zero
+        """
+        self.relative_accuracy = relative_accuracy
+        self.max_bins = max_bins
+        self.min_value = min_value
+
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} count={self.count} bins={len(self.bins)}>'
+
+    def _key(self, value):
+        return math.ceil(math.log(value) / self._log_gamma)
+
+    def _value(self, key):
+        return 2 * self._gamma ** key / (self._gamma + 1)
+
+    def _collapse(self):
+        while len(self.bins) > self.max_bins:
+            keys = sorted(self.bins)
+            self.bins[keys[1]] += self.bins.pop(keys[0])
+
+    def add(self, value, weight=1):
+        """
+        Add value to the sketch
+
+        Args:
+            value (float): non-negative value
+            weight (int): number of occurrences
+
+        Returns:
+            QuantileSketch
+        """
+        if value < 0:
+            raise ValueError(f'Value {value} is negative')
+
+        if value < self.min_value:
+            self.zero_count += weight
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + weight
+            self._collapse()
+
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+        return self
+
+    def merge(self, other):
+        """
+        Merge other sketch into this one
+
+        Args:
+            other (QuantileSketch): sketch with the same relative accuracy
+
+        Returns:
+            QuantileSketch
+        """
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('Sketches with different accuracy can not be merged')
+
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self._collapse()
+
+        self.zero_count += other.zero_count
+        self.count += other.count
+        for bound, pick in (('min', min), ('max', max)):
+            values = [v for v in (getattr(self, bound), getattr(other, bound)) if v is not None]
+            setattr(self, bound, pick(values) if values else None)
+
+        return self
+
+    def quantile(self, q):
+        """
+        Get approximate quantile
+
+        Args:
+            q (float): quantile in [0, 1]
+
+        Returns:
+            float or None for empty sketch
+        """
+        if not 0 <= q <= 1:
+            raise ValueError(f'Quantile {q} is out of [0, 1]')
+        if not self.count:
+            return None
+        if q == 0:
+            return self.min
+        if q == 1:
+            return self.max
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min
+        for key in sorted(self.bins):
+            seen += self.bins[key]
+            if rank < seen:
+                return min(max(self._value(key), self.min), self.max)
+
+        return self.max
+
+    def rank(self, value):
+        """
+        Get approximate number of values less or equal to the value
+
+        Args:
+            value (float): upper bound
+
+        Returns:
+            int
+        """
+        if value < self.min_value:
+            return self.zero_count if value >= 0 else 0
+
+        key = self._key(value)
+        return self.zero_count + sum(count for k, count in self.bins.items() if k <= key)
+
+    def histogram(self, bounds):
+        """
+        Get approximate number of values in the buckets
+
+        Args:
+            bounds (iterable(float)): ascending upper bounds of buckets
+
+        Returns:
+            list((bound, number)): the last bound is math.inf
+        """
+        result = []
+        previous = 0
+        for bound in list(bounds) + [math.inf]:
+            current = self.count if bound == math.inf else self.rank(bound)
+            result.append((bound, current - previous))
+            previous = current
+
+        return result
+
+
+class SpaceSaving:
+    """
+    Bounded-memory heavy hitters summary (Space-Saving algorithm)
+
+    Keeps at most `capacity` counters. A counted value overestimates
+    the true frequency by no more than its error, and any item with
+    frequency above total / capacity is guaranteed to be kept.
+    Summaries computed on separate streams can be merged.
+
+    The min counter is found with a heap holding one entry per item.
+    Counts only grow, so entries are refreshed lazily when they reach the top.
+    """
+    def __init__(self, capacity=1000):
+        """
+        Args:
+            capacity (int): max number of counters
+        """
+        if capacity < 1:
+            raise ValueError(f'Capacity {capacity} is not positive')
+
+        self.capacity = capacity
+        self.total = 0
+        # item: [count, error]
+        self.counters = {}
+        # (count lower bound, sequence number, item), sequence keeps items uncompared
+        self._heap = []
+        self._sequence = itertools.count()
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} total={self.total} counters={len(self.counters)}>'
+
+    @property
+    def min_count(self):
+        """
+        Min counted value or 0 if the summary is not full
+
+        Returns:
+            int
+        """
+        if len(self.counters) < self.capacity:
+            return 0
+        return self.counters[self._min()][0]
+
+    def _min(self):
+        """
+        Get item with the min count, refresh outdated heap entries
+
+        Returns:
+            hashable
+        """
+        while True:
+            count, _, item = self._heap[0]
+            current = self.counters[item][0]
+            if current == count:
+                return item
+            heapq.heapreplace(self._heap, (current, next(self._sequence), item))
+
+    def _heapify(self):
+        self._heap = [(count, next(self._sequence), item) for item, (count, _) in self.counters.items()]
+        heapq.heapify(self._heap)
+
+    def add(self, item, weight=1):
+        """
+        Count item occurrence
+
+        Args:
+            item (hashable): counted item
+            weight (int): number of occurrences
+
+        Returns:
+            SpaceSaving
+        """
+        self.total += weight
+
+        if item in self.counters:
+            self.counters[item][0] += weight
+            return self
+
+        if len(self.counters) < self.capacity:
+            self.counters[item] = [weight, 0]
+        else:
+            victim = self._min()
+            heapq.heappop(self._heap)
+            count, _ = self.counters.pop(victim)
+            self.counters[item] = [count + weight, count]
+        heapq.heappush(self._heap, (self.counters[item][0], next(self._sequence), item))
+
+        return self
+
+    def merge(self, other):
+        """
+        Merge other summary into this one
+
+        Items missing in one of summaries are counted with its min count
+        as an error, then the largest `capacity` counters are kept.
+
+        Args:
+            other (SpaceSaving): summary
+
+        Returns:
+            SpaceSaving
+        """
+        self_min, other_min = self.min_count, other.min_count
+
+        merged = {}
+        for item in self.counters.keys() | other.counters.keys():
+            count, error = self.counters.get(item, (self_min, self_min))
+            other_count, other_error = other.counters.get(item, (other_min, other_min))
+            merged[item] = [count + other_count, error + other_error]
+
+        top = heapq.nlargest(self.capacity, merged.items(), key=lambda kv: kv[1][0])
+        self.counters = dict(top)
+        self.total += other.total
+        self._heapify()
+
+        return self
+
+    def most_common(self, n=None):
+        """
+        Get top items
+
+        Args:
+            n (int): number of items or None for all
+
+        Returns:
+            list((item, count, error))
+        """
+        top = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)[:n]
+        return [(item, count, error) for item, (count, error) in top]
+
+
 class Report:
     """
     Repository analysis and reporting
@@ -49,6 +346,36 @@ class Report:
         """
         return self
 
+    def merge(self, other):
+        """
+        Merge other repository report by summing results
+
+        Args:
+            other (Report): analyzed report of the same type
+
+        Returns:
+            Report
+        """
+        self.results = [tuple(value + other_value for value, other_value in zip(row, other_row))
+                        for row, other_row in zip(self.results, other.results)]
+
+        return self
+
+    def lines(self):
+        """
+        Get results in tabular format line by line
+
+        Returns:
+            generator(str)
+        """
+        yield self.name
+        yield '-' * len(self.name)
+        yield '\t'.join(map(str, self.headers))
+        if not self.results:
+            yield ''
+        for row in self.results:
+            yield '\t'.join(map(str, row))
+
     def table(self):
         """
         Get results in tabular format
@@ -56,12 +383,7 @@ class Report:
         Returns:
             str
         """
-        return (
-            f'{self.name}\n' +
-            '-' * len(self.name) + '\n' +
-            '\t'.join(map(str, self.headers)) + '\n' +
-            '\n'.join(['\t'.join(map(str, row)) for row in self.results])
-            )
+        return '\n'.join(self.lines())
 
     def json(self):
         """
@@ -85,9 +407,9 @@ class DateLimitedReport(Report):
     Repository analysis limited by resource dates
     """
     @staticmethod
-    def filter_by_date_bounds(container, start_date, end_date):
+    def select_by_date_bounds(container, start_date, end_date):
         """
-        Filter container by data bounds.
+        Lazily filter container by data bounds.
 
         Container have to contains created_at, closed_at fields
 
@@ -97,12 +419,29 @@ class DateLimitedReport(Report):
             end_date (datetime.datetime): max date bound
 
         Returns:
-            list
+            generator
         """
-        return [item for item in container
+        return (item for item in container
                 if (item.created_at >= start_date
                     and (item.closed_at is None
-                         or item.closed_at < end_date))]
+                         or item.closed_at < end_date)))
+
+    @classmethod
+    def filter_by_date_bounds(cls, container, start_date, end_date):
+        """
+        Filter container by data bounds.
+
+        Container have to contains created_at, closed_at fields
+
+        Args:
+            container (Container, e. g. githubapi.Container): iterable container
+            start_date (datetime.datetime): min date bound
+            end_date (datetime.datetime): max date bound
+
+        Returns:
+            list
+        """
+        return list(cls.select_by_date_bounds(container, start_date, end_date))
 
     @staticmethod
     def filter_old(container, end_date, threshold):
@@ -137,25 +476,81 @@ class ActiveContributors(Report):
     name = 'Active contributors'
     headers = ('Login', 'Commit number')
 
-    def __init__(self, repo, top=30):
+    def __init__(self, repo, top=30, capacity=None, branch=None):
         """
 
         Args:
             repo: repository
             top: number of contributors to output
+            capacity: number of counters for bounded-memory counting or None for exact
+            branch: loaded branch or None for all loaded commits
         """
         super().__init__(repo)
 
         self.top = top
+        self.capacity = capacity
+        self.branch = branch
+        if branch:
+            self.name = f'{self.name} ({branch})'
+        self.counter = None
+        if capacity:
+            self.headers = self.headers + ('Error',)
+
+    def add(self, commit):
+        """
+        Count commit
+
+        Args:
+            commit (Resource): commit
+
+        Returns:
+            ActiveContributors
+        """
+        # Commits without a linked GitHub account are counted together
+        login = (commit.committer or {}).get('login') or 'Unknown'
+        if self.capacity:
+            self.counter.add(login)
+        else:
+            self.counter[login] += 1
+
+        return self
 
     def analyze(self):
-        contributors = [c.committer.get('login') if c.committer else 'Unknown'
-                        for c in self.repo.commits]
-        counter = Counter(contributors)
-        self.results = counter.most_common(self.top)
+        self.counter = SpaceSaving(self.capacity) if self.capacity else Counter()
+        commits = self.repo.branch_commits(self.branch) if self.branch else self.repo.commits
+        for commit in commits:
+            self.add(commit)
+
+        return self.summarize()
+
+    def summarize(self):
+        """
+        Build results from the counter
+
+        Returns:
+            ActiveContributors
+        """
+        self.results = self.counter.most_common(self.top)
 
         return self
 
+    def merge(self, other):
+        """
+        Merge other repository report
+
+        Args:
+            other (ActiveContributors): analyzed report with the same capacity
+
+        Returns:
+            ActiveContributors
+        """
+        if self.capacity:
+            self.counter.merge(other.counter)
+        else:
+            self.counter.update(other.counter)
+
+        return self.summarize()
+
 
 class OpenedClosedPulls(DateLimitedReport):
     """
@@ -216,3 +611,296 @@ class OpenedClosedIssues(DateLimitedReport):
         self.results = [(opened, closed)]
 
         return self
+
+
+class AgeDistribution(DateLimitedReport):
+    """
+    Percentiles and histogram of item ages in days
+
+    Ages are accumulated in a QuantileSketch, so the report works
+    in constant memory and can be merged with other repositories.
+    """
+    headers = ('Statistic', 'Value')
+    # Repository container name
+    container = None
+    quantiles = (0.5, 0.9, 0.99)
+    bins = (1, 7, 30, 90, 365)
+
+    def __init__(self, repo, start_date, end_date, relative_accuracy=0.01):
+        """
+        Args:
+            relative_accuracy (float): sketch relative accuracy
+        """
+        super().__init__(repo, start_date, end_date)
+
+        self.sketch = QuantileSketch(relative_accuracy)
+
+    def age(self, item):
+        """
+        Get item age
+
+        Args:
+            item (Resource): container item
+
+        Returns:
+            datetime.timedelta or None to skip the item
+        """
+        return None
+
+    def analyze(self):
+        self.sketch = QuantileSketch(self.sketch.relative_accuracy)
+        items = (item for item in getattr(self.repo, self.container)
+                 if self.start_date <= item.created_at < self.end_date)
+        for item in items:
+            age = self.age(item)
+            if age is not None:
+                self.sketch.add(max(age.total_seconds(), 0) / 86400)
+
+        return self.summarize()
+
+    def summarize(self):
+        """
+        Build results from the sketch
+
+        Returns:
+            AgeDistribution
+        """
+        def days(value):
+            return None if value is None else round(value, 2)
+
+        self.results = [('Count', self.sketch.count)]
+        self.results += [(f'p{q * 100:g} days', days(self.sketch.quantile(q)))
+                         for q in self.quantiles]
+        self.results += [(f'<= {bound} days' if bound != math.inf else f'> {self.bins[-1]} days', number)
+                         for bound, number in self.sketch.histogram(self.bins)]
+
+        return self
+
+    def merge(self, other):
+        """
+        Merge other repository report
+
+        Args:
+            other (AgeDistribution): analyzed report of the same type
+
+        Returns:
+            AgeDistribution
+        """
+        self.sketch.merge(other.sketch)
+
+        return self.summarize()
+
+
+class TimeToClose(AgeDistribution):
+    """
+    Distribution of time between creation and closing
+    """
+    def age(self, item):
+        if item.closed_at is None or item.closed_at >= self.end_date:
+            return None
+        return item.closed_at - item.created_at
+
+
+class OpenAge(AgeDistribution):
+    """
+    Distribution of age of items opened at the end date
+    """
+    def age(self, item):
+        if item.closed_at is not None and item.closed_at < self.end_date:
+            return None
+        return self.end_date - item.created_at
+
+
+class PullsTimeToClose(TimeToClose):
+    """
+    Distribution of pull-requests time to close
+    """
+    name = 'Pull-requests time to close'
+    container = 'pulls'
+
+
+class PullsOpenAge(OpenAge):
+    """
+    Distribution of opened pull-requests age
+    """
+    name = 'Opened pull-requests age'
+    container = 'pulls'
+
+
+class IssuesTimeToClose(TimeToClose):
+    """
+    Distribution of issues time to close
+    """
+    name = 'Issues time to close'
+    container = 'issues'
+
+
+class IssuesOpenAge(OpenAge):
+    """
+    Distribution of opened issues age
+    """
+    name = 'Opened issues age'
+    container = 'issues'
+
+
+class Writer:
+    """
+    Streaming output of reports and items
+
+    Every record is written and flushed at once,
+    so results are not accumulated in memory.
+    """
+    def __init__(self, stream=None):
+        """
+        Args:
+            stream: text stream (default: sys.stdout)
+        """
+        self.stream = stream or sys.stdout
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__}>'
+
+    def write_report(self, report, source=None):
+        """
+        Write analyzed report
+
+        Args:
+            report (Report): analyzed report
+            source (str): report source, e. g. repository name, or None for totals
+
+        Returns:
+            Writer
+        """
+        return self
+
+    def write_item(self, item):
+        """
+        Write exported item
+
+        Args:
+            item (dict): item fields, nested values are written as JSON
+
+        Returns:
+            Writer
+        """
+        return self
+
+    @staticmethod
+    def value(value):
+        """
+        Convert value to text
+
+        Returns:
+            str
+        """
+        if isinstance(value, datetime.datetime):
+            return value.isoformat()
+        if isinstance(value, (dict, list)):
+            return json.dumps(value, default=Writer.value)
+        return '' if value is None else str(value)
+
+
+class TableWriter(Writer):
+    """
+    Tab-separated tables output
+
+    Item columns are taken from the first item. Backslashes, tabs and
+    line breaks in item values are escaped, so every item is one row.
+    """
+    escapes = str.maketrans({'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'})
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+
+        self._fields = None
+
+    def write_report(self, report, source=None):
+        lines = report.lines()
+        if source:
+            # Replace report title
+            next(lines), next(lines)
+            title = f'{report.name}: {source}'
+            self.stream.write(f'{title}\n' + '-' * len(title) + '\n')
+        for line in lines:
+            self.stream.write(line + '\n')
+        self.stream.write('\n')
+        self.stream.flush()
+
+        return self
+
+    def write_item(self, item):
+        if self._fields is None:
+            self._fields = list(item)
+            self.stream.write('\t'.join(self._fields) + '\n')
+        self.stream.write('\t'.join(self.value(item.get(field)).translate(self.escapes)
+                                    for field in self._fields) + '\n')
+        self.stream.flush()
+
+        return self
+
+
+class NdjsonWriter(Writer):
+    """
+    Newline-delimited JSON output, one record per result row
+    """
+    def _write(self, record):
+        self.stream.write(json.dumps(record, default=self.value) + '\n')
+        self.stream.flush()
+
+    def write_report(self, report, source=None):
+        for row in report.results:
+            record = {'report': report.name}
+            if source:
+                record['source'] = source
+            record.update(zip(report.headers, row))
+            self._write(record)
+
+        return self
+
+    def write_item(self, item):
+        self._write(item)
+
+        return self
+
+
+class CsvWriter(Writer):
+    """
+    CSV output with a single header row
+
+    Reports of any columns share one schema: a row per result cell.
+    Item columns are taken from the first item.
+    """
+    report_header = ['Report', 'Source', 'Row', 'Column', 'Value']
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+
+        self._writer = csv.writer(self.stream)
+        self._header = None
+
+    def _writerows(self, header, rows):
+        if self._header is None:
+            self._header = header
+            self._writer.writerow(header)
+        self._writer.writerows([self.value(value) for value in row] for row in rows)
+        self.stream.flush()
+
+    def write_report(self, report, source=None):
+        self._writerows(self.report_header, ([report.name, source, number, column, value]
+                                             for number, row in enumerate(report.results, 1)
+                                             for column, value in zip(report.headers, row)))
+
+        return self
+
+    def write_item(self, item):
+        self._writerows(list(item), [[item.get(field) for field in self._header or item]])
+
+        return self
+
+
+# Writer by output type
+WRITERS = {
+    'table': TableWriter,
+    'ndjson': NdjsonWriter,
+    'csv': CsvWriter,
+    }
@@ -0,0 +1,251 @@
+import datetime
+import io
+import json
+import random
+import unittest
+from collections import Counter
+
+import githubapi
+from . import (QuantileSketch, SpaceSaving, Report, ActiveContributors, PullsTimeToClose, PullsOpenAge,
+               Writer, TableWriter, NdjsonWriter, CsvWriter)
+
+
+class QuantileSketchTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(42)
+        self.values = [random.expovariate(0.1) for _ in range(10000)]
+
+    def assertRelativeClose(self, expected, actual, accuracy=0.01):
+        self.assertLessEqual(abs(expected - actual), expected * accuracy)
+
+    def test_empty(self):
+        self.assertIsNone(QuantileSketch().quantile(0.5))
+
+    def test_quantiles(self):
+        sketch = QuantileSketch()
+        for value in self.values:
+            sketch.add(value)
+
+        ordered = sorted(self.values)
+        for q in (0.5, 0.9, 0.99):
+            self.assertRelativeClose(ordered[int(q * (len(ordered) - 1))], sketch.quantile(q))
+        self.assertEqual(ordered[0], sketch.quantile(0))
+        self.assertEqual(ordered[-1], sketch.quantile(1))
+
+    def test_merge(self):
+        whole, left, right = QuantileSketch(), QuantileSketch(), QuantileSketch()
+        for i, value in enumerate(self.values):
+            whole.add(value)
+            (left if i % 2 else right).add(value)
+
+        merged = left.merge(right)
+        self.assertEqual(whole.count, merged.count)
+        self.assertEqual(whole.bins, merged.bins)
+
+        with self.assertRaises(ValueError):
+            merged.merge(QuantileSketch(0.05))
+
+    def test_bounded(self):
+        sketch = QuantileSketch(max_bins=10)
+        for value in self.values:
+            sketch.add(value)
+
+        self.assertLessEqual(len(sketch.bins), 10)
+        self.assertRelativeClose(max(self.values), sketch.quantile(0.99), accuracy=0.5)
+
+    def test_histogram(self):
+        sketch = QuantileSketch()
+        for value in (0, 0.5, 3, 3, 100):
+            sketch.add(value)
+
+        self.assertEqual([(1, 2), (7, 2), (float('inf'), 1)], sketch.histogram([1, 7]))
+
+
+class SpaceSavingTest(unittest.TestCase):
+    def setUp(self):
+        random.seed(42)
+        # Zipf-like stream: a few heavy hitters and a long tail
+        self.stream = [f'user{int(random.paretovariate(1.2))}' for _ in range(5000)]
+
+    def test_exact_when_fits(self):
+        summary = SpaceSaving(10)
+        for item in 'aabbbc':
+            summary.add(item)
+
+        self.assertEqual([('b', 3, 0), ('a', 2, 0), ('c', 1, 0)], summary.most_common())
+
+    def test_error_bounds(self):
+        summary = SpaceSaving(20)
+        for item in self.stream:
+            summary.add(item)
+
+        exact = Counter(self.stream)
+        self.assertLessEqual(len(summary.counters), 20)
+        for item, count, error in summary.most_common():
+            self.assertLessEqual(count - error, exact[item])
+            self.assertLessEqual(exact[item], count)
+        self.assertEqual([item for item, _ in exact.most_common(3)],
+                         [item for item, _, _ in summary.most_common(3)])
+
+    def test_min_count(self):
+        summary = SpaceSaving(3)
+        for item in 'aaabbc':
+            summary.add(item)
+        summary.add('c', 5)
+        summary.add('d')
+
+        # b is the min counter, c grew after it was pushed to the heap
+        self.assertEqual([('c', 6, 0), ('a', 3, 0), ('d', 3, 2)], summary.most_common())
+        self.assertEqual(3, summary.min_count)
+
+    def test_merge(self):
+        left, right = SpaceSaving(20), SpaceSaving(20)
+        for i, item in enumerate(self.stream):
+            (left if i % 2 else right).add(item)
+
+        merged = left.merge(right)
+        exact = Counter(self.stream)
+        self.assertEqual(len(self.stream), merged.total)
+        for item, count, error in merged.most_common():
+            self.assertLessEqual(count - error, exact[item])
+            self.assertLessEqual(exact[item], count)
+
+
+class ActiveContributorsTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = githubapi.Repo('dm-logv', 'aero-stat', api_root='http://gh.com')
+        self.repo.commits = githubapi.Commits().parse(
+            [{'sha': str(i), 'committer': {'login': login}} for i, login in enumerate('aabbbc')]
+            + [{'sha': 'x', 'committer': None}])
+
+    def test_exact(self):
+        report = ActiveContributors(self.repo, top=2).analyze()
+
+        self.assertEqual([('b', 3), ('a', 2)], report.results)
+
+    def test_bounded(self):
+        report = ActiveContributors(self.repo, top=2, capacity=3).analyze()
+
+        self.assertEqual(('Login', 'Commit number', 'Error'), report.headers)
+        self.assertEqual('b', report.results[0][0])
+
+    def test_analyze_twice(self):
+        report = ActiveContributors(self.repo, top=2).analyze().analyze()
+
+        self.assertEqual([('b', 3), ('a', 2)], report.results)
+
+    def test_merge(self):
+        report = ActiveContributors(self.repo).analyze().merge(ActiveContributors(self.repo).analyze())
+
+        self.assertEqual(('b', 6), report.results[0])
+
+
+class AgeDistributionTest(unittest.TestCase):
+    def setUp(self):
+        def pull(created, closed):
+            return {'created_at': f'2019-01-{created:02}T00:00:00Z',
+                    'closed_at': closed and f'2019-01-{closed:02}T00:00:00Z'}
+
+        self.repo = githubapi.Repo('dm-logv', 'aero-stat', api_root='http://gh.com')
+        self.repo.pulls = githubapi.Pulls().parse([pull(1, 3), pull(1, 11), pull(2, None), pull(5, 25)])
+        self.dates = (datetime.datetime(2019, 1, 1), datetime.datetime(2019, 1, 21))
+
+    def test_time_to_close(self):
+        report = PullsTimeToClose(self.repo, *self.dates).analyze()
+        results = dict(report.results)
+
+        self.assertEqual(2, results['Count'])
+        self.assertAlmostEqual(2, results['p50 days'], delta=0.02)
+        self.assertEqual(1, results['<= 7 days'])
+        self.assertEqual(1, results['<= 30 days'])
+
+    def test_analyze_twice(self):
+        report = PullsTimeToClose(self.repo, *self.dates).analyze().analyze()
+
+        self.assertEqual(2, dict(report.results)['Count'])
+
+    def test_open_age(self):
+        report = PullsOpenAge(self.repo, *self.dates).analyze()
+
+        self.assertEqual(2, dict(report.results)['Count'])
+        self.assertAlmostEqual(19, report.sketch.max)
+
+    def test_merge(self):
+        report = PullsTimeToClose(self.repo, *self.dates).analyze()
+        report.merge(PullsTimeToClose(self.repo, *self.dates).analyze())
+
+        self.assertEqual(4, dict(report.results)['Count'])
+
+
+class WriterTest(unittest.TestCase):
+    def setUp(self):
+        self.report = Report(None)
+        self.report.name = 'Active contributors'
+        self.report.headers = ('Login', 'Commit number')
+        self.report.results = [('luke', 3), ('leia', 2)]
+        self.item = {'number': 1, 'created_at': datetime.datetime(2019, 1, 1), 'closed_at': None}
+        self.stream = io.StringIO()
+
+    def test_table(self):
+        TableWriter(self.stream).write_report(self.report)
+
+        self.assertEqual(self.report.table() + '\n\n', self.stream.getvalue())
+
+    def test_table_source(self):
+        TableWriter(self.stream).write_report(self.report, 'dm-logv/aero-stat')
+
+        self.assertTrue(self.stream.getvalue().startswith(
+            'Active contributors: dm-logv/aero-stat\n' + '-' * 38 + '\nLogin\t'))
+
+    def test_table_empty(self):
+        self.report.results = []
+
+        self.assertEqual('Active contributors\n' + '-' * 19 + '\nLogin\tCommit number\n', self.report.table())
+
+    def test_ndjson(self):
+        writer = NdjsonWriter(self.stream)
+        writer.write_report(self.report, 'dm-logv/aero-stat')
+        writer.write_item(self.item)
+        records = [json.loads(line) for line in self.stream.getvalue().splitlines()]
+
+        self.assertEqual({'report': 'Active contributors', 'source': 'dm-logv/aero-stat',
+                          'Login': 'luke', 'Commit number': 3}, records[0])
+        self.assertEqual({'number': 1, 'created_at': '2019-01-01T00:00:00', 'closed_at': None}, records[2])
+
+    def test_csv(self):
+        writer = CsvWriter(self.stream)
+        writer.write_report(self.report)
+        self.report.name, self.report.headers, self.report.results = 'Old pulls', ('Count',), [(4,)]
+        writer.write_report(self.report, 'dm-logv/aero-stat')
+
+        self.assertEqual(['Report,Source,Row,Column,Value',
+                          'Active contributors,,1,Login,luke',
+                          'Active contributors,,1,Commit number,3',
+                          'Active contributors,,2,Login,leia',
+                          'Active contributors,,2,Commit number,2',
+                          'Old pulls,dm-logv/aero-stat,1,Count,4'], self.stream.getvalue().splitlines())
+
+    def test_csv_items(self):
+        writer = CsvWriter(self.stream)
+        writer.write_item(self.item)
+        writer.write_item(dict(self.item, extra=True))
+
+        self.assertEqual(['number,created_at,closed_at',
+                          '1,2019-01-01T00:00:00,',
+                          '1,2019-01-01T00:00:00,'], self.stream.getvalue().splitlines())
+
+    def test_table_escape(self):
+        TableWriter(self.stream).write_item({'number': 1, 'body': 'Fix\tit\r\nnow'})
+
+        self.assertEqual('number\tbody\n1\tFix\\tit\\r\\nnow\n', self.stream.getvalue())
+
+    def test_nested(self):
+        TableWriter(self.stream).write_item({'number': 1, 'user': {'login': 'luke'}, 'labels': []})
+
+        self.assertEqual('number\tuser\tlabels\n1\t{"login": "luke"}\t[]\n', self.stream.getvalue())
+
+    def test_base(self):
+        writer = Writer(self.stream)
+
+        self.assertIs(writer, writer.write_report(self.report).write_item(self.item))
+        self.assertEqual('', self.stream.getvalue())
@@ -0,0 +1,96 @@
+import http.server
+import importlib.machinery
+import importlib.util
+import io
+import json
+import threading
+import unittest
+import weakref
+
+import githubapi
+import repoanalyzer
+import webrequest
+from webrequest.test_webrequest import SlowHandler
+
+
+def load_script():
+    loader = importlib.machinery.SourceFileLoader('analyzerepo', 'analyzerepo')
+    spec = importlib.util.spec_from_loader(loader.name, loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+analyzerepo = load_script()
+
+
+class LoadReposTest(unittest.TestCase):
+    class Repo:
+        """
+        Repo mock class loading one page
+        """
+        def __init__(self, url):
+            self.url = url
+            self.full_name = url
+
+        def load_containers(self, checkpoint=None, containers=None):
+            webrequest.get(self.url, timeout=(5, 0.2)).json()
+            return self
+
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://{}:{}'.format(*self.server.server_address)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_stalled_repo(self):
+        good = self.Repo(f'{self.url}/headers?0')
+        stalled = self.Repo(f'{self.url}/body?1')
+
+        self.assertEqual([good], list(analyzerepo.load_repos([stalled, good], jobs=2)))
+
+    def test_released(self):
+        repos = [self.Repo(f'{self.url}/headers?0') for _ in range(3)]
+        loaded = analyzerepo.load_repos(repos, jobs=1)
+        del repos
+
+        first = weakref.ref(next(loaded))
+        next(loaded)
+        self.assertIsNone(first())
+
+
+class AnalyzeReposTest(unittest.TestCase):
+    def test_unload(self):
+        repo = githubapi.Repo('dm-logv', 'aero-stat', api_root='http://gh.com')
+        repo.commits = githubapi.Commits().parse([{'sha': 'c1', 'committer': {'login': 'luke'}}])
+        repo.pulls = githubapi.Pulls().parse([])
+        repo.issues = githubapi.Issues().parse([])
+
+        totals = analyzerepo.analyze_repos([repo], None, None, unload=True)
+
+        self.assertEqual([('luke', 1)], totals[0].results)
+        self.assertIsNone(repo.commits)
+
+
+class ExportItemsTest(unittest.TestCase):
+    def test_raw(self):
+        pull = {'number': 1, 'user': {'login': 'luke'}, 'labels': [{'name': 'bug'}],
+                'created_at': '2019-01-02T00:00:00Z', 'closed_at': None}
+        repo = githubapi.Repo('dm-logv', 'aero-stat', api_root='http://gh.com')
+        repo.pulls = githubapi.Pulls().parse([pull, dict(pull, number=2, created_at='2018-01-01T00:00:00Z')])
+        stream = io.StringIO()
+
+        analyzerepo.export_items([repo], 'pulls', analyzerepo.todatetime('2019-01-01'),
+                                 analyzerepo.todatetime('2019-02-01'), repoanalyzer.NdjsonWriter(stream))
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual(1, len(records))
+        self.assertEqual('dm-logv/aero-stat', records[0].pop('repo'))
+        self.assertEqual({'login': 'luke'}, records[0]['user'])
+        self.assertEqual([{'name': 'bug'}], records[0]['labels'])
+        self.assertEqual('2019-01-02T00:00:00Z', records[0]['created_at'])
@@ -0,0 +1,140 @@
+"""
+GitHub Webhook receiver
+
+Applies push, pull_request and issues events to loaded repositories
+instead of polling the list endpoints.
+"""
+
+__all__ = ['verify_signature', 'apply_payload', 'Handler', 'Server', 'make_server']
+__version__ = '0.0.1'
+
+
+import hashlib
+import hmac
+import http.server
+import json
+
+
+def verify_signature(body, signature, secret):
+    """
+    Check X-Hub-Signature-256 header against the request body
+
+    Args:
+        body (bytes): raw request body
+        signature (str): header value (format: sha256=HEX)
+        secret (str): webhook secret
+
+    Returns:
+        bool
+    """
+    if not signature:
+        return False
+    expected = 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature)
+
+
+def apply_payload(repos, event, body):
+    """
+    Apply webhook payload to the matching repository
+
+    Args:
+        repos (dict(str, Repo)): repositories by lowercase full name
+        event (str): event name (X-GitHub-Event header)
+        body (bytes or str): JSON payload
+
+    Returns:
+        (Repo, list(Resource)) or (None, []) if repository is not tracked
+    """
+    payload = json.loads(body)
+    if not isinstance(payload, dict) or not isinstance(payload.get('repository'), dict):
+        raise ValueError('payload is not an object with repository')
+    full_name = str(payload['repository'].get('full_name', '')).lower()
+    repo = repos.get(full_name)
+    if repo is None:
+        return None, []
+
+    return repo, repo.apply_event(event, payload)
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    """
+    Webhook HTTP request handler
+
+    Server have to provide repos, secret, on_event and pending attributes.
+    """
+    def do_POST(self):
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            self.send_error(400, 'Invalid Content-Length')
+            return
+        body = self.rfile.read(length)
+
+        secret = self.server.secret
+        if secret and not verify_signature(body, self.headers.get('X-Hub-Signature-256'), secret):
+            self.send_error(403, 'Invalid signature')
+            return
+
+        try:
+            repo, items = apply_payload(self.server.repos, self.headers.get('X-GitHub-Event'), body)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.send_error(400, f'Malformed payload: {e}')
+            return
+        except OSError as e:
+            # Pushed commits could not be loaded, GitHub can redeliver the event
+            self.send_error(502, f'Commits are not loaded: {e}')
+            return
+
+        if repo is None:
+            self.send_error(404, 'Repository is not tracked')
+            return
+
+        self.send_response(202 if items else 204)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+        # Reports are updated after the response is delivered
+        if items and self.server.on_event:
+            self.server.pending.append((repo, items))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(http.server.HTTPServer):
+    """
+    Webhook HTTP server
+
+    Single-threaded, so upserts are serialized. Event callbacks run
+    after the connection is closed, so slow callbacks do not delay
+    GitHub deliveries.
+    """
+    def process_request(self, request, client_address):
+        super().process_request(request, client_address)
+
+        while self.pending:
+            self.on_event(*self.pending.pop(0))
+
+
+def make_server(address, repos, secret=None, on_event=None):
+    """
+    Create webhook HTTP server
+
+    Args:
+        address (tuple): host, port
+        repos (iterable(Repo)): loaded repositories
+        secret (str): webhook secret or None to skip signature check
+        on_event (callable): called with repo and upserted items after each applied event
+
+    Returns:
+        Server
+    """
+    server = Server(address, Handler)
+    server.repos = {repo.full_name.lower(): repo for repo in repos}
+    server.secret = secret
+    server.on_event = on_event
+    server.pending = []
+
+    return server
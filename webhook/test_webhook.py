@@ -0,0 +1,181 @@
+import hashlib
+import hmac
+import http.client
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+import githubapi
+from . import *
+
+
+# Recorded payloads (trimmed to the fields used by reports)
+PUSH = {
+    'ref': 'refs/heads/master',
+    'repository': {'full_name': 'dm-logv/aero-stat'},
+    'commits': [
+        {'id': '0d1a26e67d8f5eaf1f6ba5c57fc3c7d91ac0fd1c',
+         'message': 'Update README.md',
+         'timestamp': '2015-05-05T19:40:15-04:00',
+         'author': {'name': 'baxterthehacker', 'email': 'baxterthehacker@users.noreply.github.com',
+                    'username': 'baxterthehacker'},
+         'committer': {'name': 'baxterthehacker', 'email': 'baxterthehacker@users.noreply.github.com',
+                       'username': 'baxterthehacker'}},
+        {'id': 'a10867b14bb761a232cd80139fbd4c0d33264240',
+         'message': 'Fix typo',
+         'timestamp': '2015-05-05T19:41:00-04:00',
+         'author': {'name': 'Anonymous', 'email': 'anon@example.com'},
+         'committer': {'name': 'Anonymous', 'email': 'anon@example.com'}},
+        ],
+    }
+
+PULL_OPENED = {
+    'action': 'opened',
+    'repository': {'full_name': 'dm-logv/aero-stat'},
+    'pull_request': {'id': 34778301, 'number': 1, 'state': 'open',
+                     'created_at': '2015-05-05T23:40:27Z', 'closed_at': None},
+    }
+
+PULL_CLOSED = {
+    'action': 'closed',
+    'repository': {'full_name': 'dm-logv/aero-stat'},
+    'pull_request': {'id': 34778301, 'number': 1, 'state': 'closed',
+                     'created_at': '2015-05-05T23:40:27Z', 'closed_at': '2015-05-06T10:00:00Z'},
+    }
+
+ISSUE_OPENED = {
+    'action': 'opened',
+    'repository': {'full_name': 'dm-logv/aero-stat'},
+    'issue': {'id': 73464126, 'number': 2, 'state': 'open',
+              'created_at': '2015-05-05T23:40:28Z', 'closed_at': None},
+    }
+
+
+def make_repo():
+    repo = githubapi.Repo('dm-logv', 'aero-stat', api_root='http://gh.com')
+    repo.commits = githubapi.Commits().parse([{'sha': 'a10867b14bb761a232cd80139fbd4c0d33264240',
+                                               'committer': {'login': 'stale'}}])
+    repo.pulls = githubapi.Pulls().parse([])
+    repo.issues = githubapi.Issues().parse([])
+    return repo
+
+
+class ApplyPayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.repo = make_repo()
+        self.repos = {'dm-logv/aero-stat': self.repo}
+
+    def replay(self, event, payload):
+        return apply_payload(self.repos, event, json.dumps(payload))
+
+    def test_push(self):
+        repo, items = self.replay('push', PUSH)
+
+        self.assertIs(self.repo, repo)
+        self.assertEqual(1, len(items))
+        self.assertEqual(2, len(list(self.repo.commits)))
+        self.assertEqual({'login': 'baxterthehacker'}, self.repo.commits[1].committer)
+        # Known sha is not rewritten
+        self.assertEqual({'login': 'stale'}, self.repo.commits[0].committer)
+
+    def test_push_other_branch(self):
+        _, items = self.replay('push', dict(PUSH, ref='refs/heads/develop'))
+
+        self.assertEqual([], items)
+        self.assertEqual(1, len(list(self.repo.commits)))
+
+    def test_pull_upsert(self):
+        self.replay('pull_request', PULL_OPENED)
+        self.replay('pull_request', PULL_CLOSED)
+
+        self.assertEqual(1, len(list(self.repo.pulls)))
+        self.assertEqual('closed', self.repo.pulls[0].state)
+        self.assertEqual(2015, self.repo.pulls[0].closed_at.year)
+
+    def test_issue(self):
+        self.replay('issues', ISSUE_OPENED)
+
+        self.assertEqual(73464126, self.repo.issues[0].id)
+
+    def test_deleted(self):
+        self.replay('issues', ISSUE_OPENED)
+        _, items = self.replay('issues', dict(ISSUE_OPENED, action='deleted'))
+
+        self.assertEqual(1, len(items))
+        self.assertEqual([], list(self.repo.issues))
+
+    def test_malformed(self):
+        for body in ('[]', '{"repository": null}', '{"repository": []}'):
+            with self.assertRaises(ValueError):
+                apply_payload(self.repos, 'issues', body)
+
+    def test_unknown(self):
+        self.assertEqual((self.repo, []), self.replay('watch', PULL_OPENED))
+        self.assertEqual((None, []), self.replay(
+            'issues', dict(ISSUE_OPENED, repository={'full_name': 'other/repo'})))
+
+
+class ServerTest(unittest.TestCase):
+    secret = 'It is a secret to everybody'
+
+    def setUp(self):
+        self.repo = make_repo()
+        self.events = []
+        self.handled = threading.Event()
+        self.server = make_server(('127.0.0.1', 0), [self.repo], secret=self.secret,
+                                  on_event=self.on_event)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def on_event(self, repo, items):
+        self.events.append(items)
+        self.handled.set()
+
+    def post(self, event, payload, secret=None):
+        body = json.dumps(payload).encode()
+        signature = 'sha256=' + hmac.new((secret or self.secret).encode(), body, hashlib.sha256).hexdigest()
+        request = urllib.request.Request(
+            'http://{}:{}/'.format(*self.server.server_address), data=body,
+            headers={'X-GitHub-Event': event, 'X-Hub-Signature-256': signature})
+        return urllib.request.urlopen(request).status
+
+    def test_post(self):
+        self.assertEqual(202, self.post('pull_request', PULL_OPENED))
+        self.assertTrue(self.handled.wait(5))
+        self.assertEqual(1, len(self.events))
+        self.assertEqual('open', self.repo.pulls[0].state)
+
+    def test_malformed(self):
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            self.post('issues', [ISSUE_OPENED])
+        self.assertEqual(400, e.exception.code)
+
+    def test_response_before_event(self):
+        release = threading.Event()
+        self.server.on_event = lambda repo, items: release.wait(5) and self.handled.set()
+
+        # Response arrives while the callback is still running
+        self.assertEqual(202, self.post('issues', ISSUE_OPENED))
+        self.assertFalse(self.handled.is_set())
+        release.set()
+        self.assertTrue(self.handled.wait(5))
+
+    def test_invalid_length(self):
+        for length in ('many', '-1'):
+            connection = http.client.HTTPConnection(*self.server.server_address)
+            connection.request('POST', '/', body=b'{}', headers={'Content-Length': length})
+            self.assertEqual(400, connection.getresponse().status)
+            connection.close()
+
+    def test_invalid_signature(self):
+        with self.assertRaises(urllib.error.HTTPError) as e:
+            self.post('pull_request', PULL_OPENED, secret='wrong')
+        self.assertEqual(403, e.exception.code)
+        self.assertEqual([], list(self.repo.pulls))
@@ -4,16 +4,78 @@ Web Request Demo package
 Provides REST Get method.
 """
 
-__all__ = ['get', 'get_json']
+__all__ = ['get', 'get_json', 'Limiter', 'Hedger', 'Cache']
 __version__ = '0.0.1'
 
 
 import base64
+import collections
+import concurrent.futures
+import functools
+import http.client
+import itertools
 import json
+import socket
 import ssl
+import threading
+import time
+import urllib.error
 import urllib.request
 
 
+# Default connect and read timeouts in seconds
+TIMEOUT = (10, 60)
+
+
+class _ReadTimeoutConnection:
+    """
+    HTTP connection switching socket to the read timeout after connect
+    """
+    def __init__(self, *args, read_timeout=None, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.read_timeout = read_timeout
+
+    def connect(self):
+        super().connect()
+        self.sock.settimeout(self.read_timeout)
+
+
+class _HTTPConnection(_ReadTimeoutConnection, http.client.HTTPConnection):
+    pass
+
+
+class _HTTPSConnection(_ReadTimeoutConnection, http.client.HTTPSConnection):
+    pass
+
+
+class _ReadTimeoutHandler:
+    """
+    urllib handler opening read timeout connections
+
+    Request timeout is used for connect only.
+    """
+    connections = {http.client.HTTPConnection: _HTTPConnection,
+                   http.client.HTTPSConnection: _HTTPSConnection}
+
+    def __init__(self, read_timeout, **kwargs):
+        super().__init__(**kwargs)
+
+        self.read_timeout = read_timeout
+
+    def do_open(self, http_class, req, **kwargs):
+        connection = functools.partial(self.connections[http_class], read_timeout=self.read_timeout)
+        return super().do_open(connection, req, **kwargs)
+
+
+class _HTTPHandler(_ReadTimeoutHandler, urllib.request.HTTPHandler):
+    pass
+
+
+class _HTTPSHandler(_ReadTimeoutHandler, urllib.request.HTTPSHandler):
+    pass
+
+
 class Headers:
     """
     HTTP Headers
@@ -45,18 +107,35 @@ class Headers:
         self._headers = headers
         self.links = self._parse_links(self._headers.get('Link')) or {}
 
+    def get(self, name, default=None):
+        """
+        Get header value
+
+        Args:
+            name (str): header name
+            default: value for missing header
+
+        Returns:
+            str
+        """
+        return self._headers.get(name, default)
+
 
 class Response:
     """
     HTTP Response object
     """
-    def __init__(self, url, credentials=(), ignore_ssl=True):
+    def __init__(self, url, credentials=(), ignore_ssl=True, headers=None, timeout=TIMEOUT):
         self.url = None
         self.response = None
         self.headers = None
+        self.status = None
+        self.content = None
 
         self._credentials = credentials
         self._ignore_ssl = ignore_ssl
+        self._request_headers = headers or {}
+        self._timeout = timeout
 
         self.get(url, ignore_ssl)
 
@@ -70,7 +149,7 @@ class Response:
         Returns:
             str
         """
-        return self.response.read().decode()
+        return self.content.decode()
 
     @property
     def credentials(self):
@@ -86,10 +165,26 @@ class Response:
         encoded = base64.b64encode(credentials.encode('ascii'))
         return 'Basic {}'.format(encoded.decode('ascii'))
 
+    @property
+    def timeouts(self):
+        """
+        Connect and read timeouts
+
+        Returns:
+            (connect, read): seconds or None for blocking socket
+        """
+        if isinstance(self._timeout, (tuple, list)):
+            return tuple(self._timeout)
+        return self._timeout, self._timeout
+
     def get(self, url, ignore_ssl=True):
         """
         Load via HTTP Get method
 
+        Connect timeout limits the connection establishment, read timeout
+        limits every socket read: waiting for headers and each body chunk.
+        Response body is read at once. Timeouts raise URLError.
+
         Args:
             url (str): resource URL
         """
@@ -103,13 +198,25 @@ class Response:
             ctx.verify_mode = ssl.CERT_NONE
 
         self.url = url
+        request = urllib.request.Request(url, headers=self._request_headers)
         if self.credentials:
-            request = urllib.request.Request(url)
             request.add_header('Authorization', self.credentials)
-            self.response = urllib.request.urlopen(request, context=ctx)
-        else:
-            self.response = urllib.request.urlopen(self.url, context=ctx)
-        self.headers = Headers(self.response.info())
+        connect_timeout, read_timeout = self.timeouts
+        opener = urllib.request.build_opener(_HTTPHandler(read_timeout),
+                                             _HTTPSHandler(read_timeout, context=ctx))
+        try:
+            try:
+                self.response = opener.open(request, timeout=connect_timeout)
+            except urllib.error.HTTPError as e:
+                # Conditional request: resource is not modified
+                if e.code != 304:
+                    raise
+                self.response = e
+            self.status = self.response.getcode()
+            self.headers = Headers(self.response.info())
+            self.content = self.response.read()
+        except socket.timeout as e:
+            raise urllib.error.URLError(e)
 
     def json(self):
         """
@@ -121,18 +228,20 @@ class Response:
         return json.loads(str(self))
 
 
-def get(url, credentials=()):
+def get(url, credentials=(), headers=None, timeout=TIMEOUT):
     """
     Returns HTTP GET response
 
     Args:
         url (str): source URL
         credentials (tuple): login, password
+        headers (dict): additional request headers, e. g. If-None-Match
+        timeout (float or tuple): seconds or (connect, read) seconds
 
     Returns:
         str
     """
-    return Response(url, credentials=credentials)
+    return Response(url, credentials=credentials, headers=headers, timeout=timeout)
 
 
 def get_json(url, credentials=()):
@@ -147,3 +256,419 @@ def get_json(url, credentials=()):
         dict
     """
     return Response(url, credentials=credentials).json()
+
+
+class Limiter:
+    """
+    Shared request budget
+
+    Limits the number of concurrent requests and their rate,
+    and waits for GitHub rate limit reset when it is exhausted.
+    Requests rejected by the rate limit (403, 429) are retried after the reset.
+    Provides the same get method as the module, so it can be passed as API.
+    """
+    def __init__(self, api=None, concurrency=4, rate=None, retries=3):
+        """
+        Args:
+            api: REST API methods class or None for this module
+            concurrency (int): max number of simultaneous requests
+            rate (float): max number of requests per second or None for unlimited
+            retries (int): max number of retries of a rate limited request
+        """
+        self._api = api
+        self.retries = retries
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self._interval = 1 / rate if rate else 0
+        self._next = 0
+
+        self.requests = 0
+        self.waited = 0
+        self.limited = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} requests={self.requests} waited={self.waited:.1f}s>'
+
+    @staticmethod
+    def _reset_delay(headers):
+        """
+        Get time till the rate limit reset
+
+        Args:
+            headers (Headers): response headers
+
+        Returns:
+            float: seconds or None if rate limit is not exhausted
+        """
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            return float(retry_after) if retry_after.isdigit() else 60
+        if headers.get('X-RateLimit-Remaining') == '0':
+            return max(int(headers.get('X-RateLimit-Reset', 0)) - time.time(), 0) + 1
+        return None
+
+    def _postpone(self, delay):
+        """
+        Postpone next requests
+
+        Args:
+            delay (float): seconds
+        """
+        with self._lock:
+            self._next = max(self._next, time.monotonic() + delay)
+
+    def _acquire(self):
+        """
+        Reserve a time slot for the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self._interval
+            self.requests += 1
+            self.waited += start - now
+
+        time.sleep(start - now)
+
+    def _update(self, headers):
+        """
+        Postpone next requests till the rate limit reset
+
+        Args:
+            headers (Headers): response headers
+        """
+        delay = headers and self._reset_delay(headers)
+        if delay is not None:
+            self._postpone(delay)
+
+    def get(self, url, on_send=None, **kwargs):
+        """
+        Returns HTTP GET response within the budget
+
+        Args:
+            url (str): source URL
+            on_send (callable): called when the request is sent after waiting for the budget
+            **kwargs: API arguments
+
+        Returns:
+            Response
+        """
+        for attempt in itertools.count():
+            with self._slots:
+                self._acquire()
+                if on_send:
+                    on_send()
+                try:
+                    response = (self._api.get if self._api else get)(url, **kwargs)
+                except urllib.error.HTTPError as e:
+                    delay = self._reset_delay(Headers(e.headers)) if e.code in (403, 429) else None
+                    if delay is None or attempt >= self.retries:
+                        raise
+                    self.limited += 1
+                    self._postpone(delay)
+                    continue
+
+            self._update(response.headers)
+
+            return response
+
+
+class Hedger:
+    """
+    Hedged requests
+
+    If a response does not arrive within the latency percentile
+    of recent requests, a duplicate request is issued and the first
+    response wins. Duplicates go through the wrapped API, so a Limiter
+    keeps them within the rate budget, and their share is limited.
+    Latencies and the hedge delay are counted from the moment a wrapped
+    Limiter sends the request, so waiting for the budget is not included.
+    Requests run in daemon threads: losing ones do not delay exit.
+    Provides the same get method as the module, so it can be passed as API.
+    """
+    def __init__(self, api=None, percentile=95, window=100, min_samples=20, max_ratio=0.1, workers=8):
+        """
+        Args:
+            api: REST API methods class or None for this module
+            percentile (float): latency percentile to wait before hedging
+            window (int): number of recent latencies to track
+            min_samples (int): number of latencies required to start hedging
+            max_ratio (float): max share of hedged requests
+            workers (int): max number of simultaneous requests
+        """
+        self._api = api
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+
+        self._latencies = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._workers = threading.BoundedSemaphore(workers)
+
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} requests={self.requests} hedged={self.hedged}>'
+
+    @property
+    def delay(self):
+        """
+        Time to wait for a response before hedging
+
+        Returns:
+            float: seconds or None if hedging is not possible
+        """
+        with self._lock:
+            if len(self._latencies) < self.min_samples or self.hedged >= self.max_ratio * self.requests:
+                return None
+            latencies = sorted(self._latencies)
+
+        return latencies[min(int(len(latencies) * self.percentile / 100), len(latencies) - 1)]
+
+    @property
+    def metrics(self):
+        """
+        Hedging counters
+
+        Returns:
+            dict
+        """
+        return {'requests': self.requests, 'hedged': self.hedged, 'hedge_wins': self.hedge_wins,
+                'delay': self.delay}
+
+    def _get(self, url, kwargs, sent):
+        """
+        Run request and track its latency
+
+        Args:
+            url (str): source URL
+            kwargs (dict): API arguments
+            sent (threading.Event): set when the request is sent or failed
+
+        Returns:
+            Response
+        """
+        start = None
+
+        def on_send():
+            nonlocal start
+            start = time.monotonic()
+            sent.set()
+
+        try:
+            with self._workers:
+                if isinstance(self._api, Limiter):
+                    response = self._api.get(url, on_send=on_send, **kwargs)
+                else:
+                    on_send()
+                    response = (self._api.get if self._api else get)(url, **kwargs)
+        finally:
+            sent.set()
+        with self._lock:
+            self._latencies.append(time.monotonic() - start)
+        return response
+
+    def _submit(self, url, kwargs):
+        """
+        Start request in a daemon thread
+
+        Returns:
+            (Future, threading.Event): response future and event set when the request is sent
+        """
+        future = concurrent.futures.Future()
+        sent = threading.Event()
+
+        def run():
+            try:
+                future.set_result(self._get(url, kwargs, sent))
+            except BaseException as e:
+                future.set_exception(e)
+
+        threading.Thread(target=run, daemon=True).start()
+        return future, sent
+
+    def get(self, url, **kwargs):
+        """
+        Returns HTTP GET response of the fastest request
+
+        Args:
+            url (str): source URL
+            **kwargs: API arguments
+
+        Returns:
+            Response
+        """
+        delay = self.delay
+        with self._lock:
+            self.requests += 1
+
+        primary, sent = self._submit(url, kwargs)
+        if delay is not None:
+            # Hedge delay starts when the request leaves the Limiter queue
+            sent.wait()
+        if delay is None or concurrent.futures.wait([primary], timeout=delay).done:
+            return primary.result()
+
+        with self._lock:
+            self.hedged += 1
+        hedge, _ = self._submit(url, kwargs)
+
+        pending = {primary, hedge}
+        while pending:
+            done, pending = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            # Failed request waits for the other one
+            succeeded = [future for future in done if future.exception() is None]
+            if succeeded:
+                winner = succeeded[0]
+                break
+        else:
+            return primary.result()
+
+        if winner is hedge:
+            with self._lock:
+                self.hedge_wins += 1
+
+        return winner.result()
+
+
+class CachedResponse:
+    """
+    HTTP Response body shared by cache hits and coalesced requests
+    """
+    def __init__(self, response):
+        self.url = response.url
+        self.status = getattr(response, 'status', None)
+        self.headers = response.headers
+        self.content = response.content
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} url="{self.url}">'
+
+    def __str__(self):
+        return self.content.decode()
+
+    def json(self):
+        """
+        Parse JSON response
+
+        Every call returns new objects, so callers may modify them.
+
+        Returns:
+            dict or list
+        """
+        return json.loads(str(self))
+
+
+class Cache:
+    """
+    In-process responses cache
+
+    Concurrent requests for the same URL and arguments are coalesced
+    into one, response bodies are kept in a size and TTL bounded LRU.
+    Paginated responses (with Link header) and conditional requests
+    (with headers) are not cached: listings are read once.
+    Provides the same get method as the module, so it can be passed as API.
+    """
+    def __init__(self, api=None, maxsize=256, ttl=300):
+        """
+        Args:
+            api: REST API methods class or None for this module
+            maxsize (int): max number of cached responses
+            ttl (float): seconds to keep a response
+        """
+        self._api = api
+        self.maxsize = maxsize
+        self.ttl = ttl
+
+        self._lock = threading.Lock()
+        # key: (expires, CachedResponse)
+        self._entries = collections.OrderedDict()
+        # key: Future of the running request
+        self._running = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def __repr__(self):
+        return f'<{self.__class__.__name__} size={len(self._entries)} hits={self.hits} misses={self.misses}>'
+
+    @property
+    def metrics(self):
+        """
+        Cache counters
+
+        Returns:
+            dict
+        """
+        return {'hits': self.hits, 'misses': self.misses, 'coalesced': self.coalesced, 'size': len(self._entries)}
+
+    def _lookup(self, key):
+        """
+        Get fresh cached response or future of the running request
+
+        Returns:
+            (CachedResponse, Future, bool): response or future, and whether the caller has to run the request
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1], None, False
+            if entry:
+                del self._entries[key]
+
+            if key in self._running:
+                self.coalesced += 1
+                return None, self._running[key], False
+
+            self.misses += 1
+            future = self._running[key] = concurrent.futures.Future()
+            return None, future, True
+
+    def _store(self, key, response):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get(self, url, **kwargs):
+        """
+        Returns cached, coalesced or new HTTP GET response
+
+        Args:
+            url (str): source URL
+            **kwargs: API arguments
+
+        Returns:
+            CachedResponse for hits and coalesced requests, or Response
+        """
+        api_get = self._api.get if self._api else get
+        if kwargs.get('headers'):
+            return api_get(url, **kwargs)
+
+        key = (url, tuple(sorted((k, repr(v)) for k, v in kwargs.items())))
+        response, future, owner = self._lookup(key)
+        if response:
+            return response
+        if not owner:
+            return future.result()
+
+        try:
+            response = api_get(url, **kwargs)
+            cached = CachedResponse(response)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            if not (response.headers and response.headers.links):
+                self._store(key, cached)
+            future.set_result(cached)
+            return response
+        finally:
+            with self._lock:
+                del self._running[key]
@@ -1,9 +1,12 @@
+import http.server
 import json.decoder
+import threading
+import time
 import unittest
 import urllib.error
 
 from . import *
-from . import Headers
+from . import CachedResponse, Headers
 
 
 class HeadersLinkTest(unittest.TestCase):
@@ -69,3 +72,312 @@ class GetJsonTest(unittest.TestCase):
     def test_malformed(self):
         with self.assertRaises(json.decoder.JSONDecodeError):
             get_json('http://google.com')
+
+
+class LimiterTest(unittest.TestCase):
+    class Api:
+        """
+        WebApi mock class counting simultaneous requests
+        """
+        def __init__(self, headers=None):
+            self.active = 0
+            self.max_active = 0
+            self.headers = headers
+            self.lock = threading.Lock()
+
+        def get(self, url, **kwargs):
+            with self.lock:
+                self.active += 1
+                self.max_active = max(self.max_active, self.active)
+            time.sleep(0.01)
+            with self.lock:
+                self.active -= 1
+
+            class Response:
+                headers = self.headers
+
+            return Response()
+
+    def test_concurrency(self):
+        api = self.Api()
+        limiter = Limiter(api, concurrency=2)
+        threads = [threading.Thread(target=limiter.get, args=('http://s.wr',)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(6, limiter.requests)
+        self.assertLessEqual(api.max_active, 2)
+
+    def test_rate(self):
+        limiter = Limiter(self.Api(), rate=50)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.get('http://s.wr')
+
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 50)
+
+    def test_rate_limited_retry(self):
+        class Api:
+            requested = 0
+
+            def get(self, url, **kwargs):
+                Api.requested += 1
+                if Api.requested == 1:
+                    raise urllib.error.HTTPError(url, 429, 'Too Many Requests', {'Retry-After': '0'}, None)
+                if Api.requested == 2:
+                    raise urllib.error.HTTPError(url, 403, 'Forbidden', {
+                        'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) - 1)}, None)
+
+                class Response:
+                    headers = None
+
+                return Response()
+
+        limiter = Limiter(Api())
+        limiter.get('http://s.wr')
+
+        self.assertEqual(3, Api.requested)
+        self.assertEqual(2, limiter.limited)
+
+    def test_forbidden(self):
+        class Api:
+            def get(self, url, **kwargs):
+                raise urllib.error.HTTPError(url, 403, 'Forbidden', {}, None)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            Limiter(Api()).get('http://s.wr')
+
+    def test_rate_limit_reset(self):
+        headers = Headers({'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) + 60)})
+        limiter = Limiter(self.Api(headers))
+        limiter.get('http://s.wr')
+
+        self.assertGreater(limiter._next - time.monotonic(), 50)
+
+
+class SlowHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Local server handler delaying headers or body by the query seconds
+    """
+    def do_GET(self):
+        path, _, delay = self.path.partition('?')
+        if path == '/headers':
+            time.sleep(float(delay))
+        self.send_response(200)
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.flush()
+        if path == '/body':
+            time.sleep(float(delay))
+        try:
+            self.wfile.write(b'{}')
+        except OSError:
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TimeoutTest(unittest.TestCase):
+    def setUp(self):
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), SlowHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://{}:{}'.format(*self.server.server_address)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_in_time(self):
+        self.assertEqual({}, get_json(f'{self.url}/headers?0'))
+
+    def test_headers_timeout(self):
+        with self.assertRaises(urllib.error.URLError):
+            get(f'{self.url}/headers?1', timeout=0.2)
+
+    def test_read_timeout(self):
+        # Connect timeout does not limit waiting for the response
+        self.assertEqual({}, get(f'{self.url}/headers?0.3', timeout=(0.1, 1)).json())
+        self.assertEqual({}, get(f'{self.url}/body?0.3', timeout=(0.1, 1)).json())
+        with self.assertRaises(urllib.error.URLError):
+            get(f'{self.url}/headers?1', timeout=(5, 0.2))
+        with self.assertRaises(urllib.error.URLError):
+            get(f'{self.url}/body?1', timeout=(5, 0.2))
+
+
+class HedgerTest(unittest.TestCase):
+    class Api:
+        """
+        WebApi mock class with scripted delays
+        """
+        def __init__(self, delays):
+            self.delays = iter(delays)
+            self.requested = 0
+            self.lock = threading.Lock()
+
+        class Response(float):
+            headers = None
+
+        def get(self, url, **kwargs):
+            with self.lock:
+                self.requested += 1
+                delay = next(self.delays, 0)
+            time.sleep(delay)
+            return self.Response(delay)
+
+    def test_no_samples(self):
+        api = self.Api([0.05])
+        hedger = Hedger(api)
+
+        self.assertEqual(0.05, hedger.get('http://s.wr'))
+        self.assertEqual(0, hedger.hedged)
+
+    def test_hedge(self):
+        api = self.Api([0.01] * 5 + [1, 0.01])
+        hedger = Hedger(api, min_samples=5, max_ratio=1)
+        for _ in range(5):
+            hedger.get('http://s.wr')
+
+        start = time.monotonic()
+        self.assertEqual(0.01, hedger.get('http://s.wr'))
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual({'requests': 6, 'hedged': 1, 'hedge_wins': 1},
+                         {k: v for k, v in hedger.metrics.items() if k != 'delay'})
+
+    def test_limiter_wait(self):
+        api = self.Api([0.01] * 5)
+        hedger = Hedger(Limiter(api, rate=10), min_samples=5)
+        for _ in range(5):
+            hedger.get('http://s.wr')
+
+        # Rate limit waits (0.1 s) are not counted as latency
+        self.assertLess(max(hedger._latencies), 0.08)
+
+    def test_max_ratio(self):
+        api = self.Api([0.01] * 5 + [0.2, 0.2])
+        hedger = Hedger(api, min_samples=5, max_ratio=0.1)
+        for _ in range(7):
+            hedger.get('http://s.wr')
+
+        self.assertEqual(1, hedger.hedged)
+
+
+class CacheTest(unittest.TestCase):
+    class Api:
+        """
+        WebApi mock class counting requests
+        """
+        def __init__(self, delay=0):
+            self.delay = delay
+            self.requested = []
+
+        def get(self, url, **kwargs):
+            self.requested.append(url)
+            time.sleep(self.delay)
+            if url == 'http://s.wr/error':
+                raise ConnectionError(url)
+
+            class Response:
+                status = 200
+
+                def json(self):
+                    return json.loads(self.content)
+
+            response = Response()
+            response.url = url
+            response.content = json.dumps({'url': url, 'items': [1, 2]}).encode()
+            # Listings are paginated
+            links = f'<{url}&page=2>; rel="next"' if '?' in url else None
+            response.headers = Headers({'Link': links} if links else {})
+            return response
+
+    def test_hit(self):
+        api = self.Api()
+        cache = Cache(api)
+        first = cache.get('http://s.wr', credentials=('luke', 'force')).json()
+        first['items'].append(3)
+
+        self.assertEqual([1, 2], cache.get('http://s.wr', credentials=('luke', 'force')).json()['items'])
+        self.assertEqual(1, len(api.requested))
+        self.assertEqual({'hits': 1, 'misses': 1, 'coalesced': 0, 'size': 1}, cache.metrics)
+
+    def test_owner(self):
+        api = self.Api()
+        cache = Cache(api)
+        response = cache.get('http://s.wr')
+
+        # The requester gets the original response, hits get new parsed objects
+        self.assertNotIsInstance(response, CachedResponse)
+        self.assertIsNot(cache.get('http://s.wr').json(), cache.get('http://s.wr').json())
+
+    def test_paginated(self):
+        api = self.Api()
+        cache = Cache(api)
+        for _ in range(2):
+            self.assertEqual([1, 2], cache.get('http://s.wr/commits?per_page=100').json()['items'])
+
+        self.assertEqual(2, len(api.requested))
+        self.assertEqual(0, cache.metrics['size'])
+
+    def test_credentials(self):
+        api = self.Api()
+        cache = Cache(api)
+        cache.get('http://s.wr', credentials=('luke', 'force'))
+        cache.get('http://s.wr', credentials=('leia', 'force'))
+
+        self.assertEqual(2, len(api.requested))
+
+    def test_ttl(self):
+        api = self.Api()
+        cache = Cache(api, ttl=0.05)
+        cache.get('http://s.wr')
+        time.sleep(0.1)
+        cache.get('http://s.wr')
+
+        self.assertEqual(2, cache.misses)
+
+    def test_lru(self):
+        api = self.Api()
+        cache = Cache(api, maxsize=2)
+        for url in ('http://s.wr/1', 'http://s.wr/2', 'http://s.wr/1', 'http://s.wr/3', 'http://s.wr/1'):
+            cache.get(url)
+
+        self.assertEqual(['http://s.wr/1', 'http://s.wr/2', 'http://s.wr/3'], api.requested)
+
+    def test_conditional(self):
+        api = self.Api()
+        cache = Cache(api)
+        cache.get('http://s.wr', headers={'If-None-Match': '"etag"'})
+        cache.get('http://s.wr', headers={'If-None-Match': '"etag"'})
+
+        self.assertEqual(2, len(api.requested))
+        self.assertEqual(0, cache.misses)
+
+    def test_coalescing(self):
+        api = self.Api(delay=0.1)
+        cache = Cache(api)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get('http://s.wr').json()))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(1, len(api.requested))
+        self.assertEqual(5, len(results))
+        self.assertEqual(4, cache.coalesced)
+
+    def test_error(self):
+        api = self.Api()
+        cache = Cache(api)
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                cache.get('http://s.wr/error')
+
+        self.assertEqual(2, len(api.requested))
+        self.assertEqual({}, cache._running)